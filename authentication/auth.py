@@ -11,6 +11,8 @@ from fastapi.security import (
 )
 from pydantic import BaseModel, EmailStr, SecretStr
 
+from FastAPI.common.sqlite_pool import SQLitePool, create_unique_index
+
 # pip install python-multipart
 
 SQLITE_DB_NAME = "mydb.db"
@@ -22,18 +24,13 @@ security = HTTPBasic()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-async def get_db():
-    """Створення там повернення з'єднання з БД."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
-        connection.row_factory = aiosqlite.Row
-        yield connection
-
-        await connection.close()
+# довгоживучі з'єднання з БД, які відкриваються при старті сервера
+pool = SQLitePool(SQLITE_DB_NAME)
 
 
 async def create_tables() -> None:
-    """Створення таблиць в БД при старті програми та автоматичне закриття з'єднання після завершення."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
+    """Створення таблиць в БД при старті програми через з'єднання пулу для запису."""
+    async with pool.writer() as connection:
         cursor: aiosqlite.Cursor = await connection.cursor()
         await cursor.execute(
             """
@@ -46,11 +43,13 @@ async def create_tables() -> None:
                 );
             """
         )
+        # email унікальний, тому реєстрація - один INSERT без попередньої перевірки
+        # якщо в існуючій БД вже є дублікати email, сервер не стартує з поясненням
+        await create_unique_index(connection, "ux_users_email", "users", "email")
         await connection.commit()
-        await connection.close()
 
 
-app = FastAPI(on_startup=(create_tables,))
+app = FastAPI(on_startup=(pool.open, create_tables), on_shutdown=(pool.close,))
 
 
 class UserCreate(BaseModel):
@@ -98,7 +97,7 @@ async def decode_token(token: str):
 @app.get("/users/me/token", status_code=status.HTTP_200_OK, response_model=UserShow)
 async def get_user_me_token(
     token: str = Depends(oauth2_scheme),
-    connection: aiosqlite.Connection = Depends(get_db),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> UserShow:
     """Отримання даних про поточного автентифікованого користувача."""
     decoded_email = await decode_token(token)
@@ -132,7 +131,7 @@ async def get_user_me_token(
 @app.get("/users/me/basic", status_code=status.HTTP_200_OK, response_model=UserShow)
 async def get_user_me_basic(
     credentials: HTTPBasicCredentials = Depends(security),
-    connection: aiosqlite.Connection = Depends(get_db),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> UserShow:
     """
     Отримання даних про поточного автентифікованого користувача
@@ -172,7 +171,7 @@ async def get_user_me_basic(
 @app.post("/token", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    connection: aiosqlite.Connection = Depends(get_db),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> Token:
     """
     Отримання токену автентифікації для доступу до захищених ендпоінтів.
@@ -212,29 +211,26 @@ async def login(
 #  -d '{ "name": "Jack Smith", "email": "jack.smith@example.com", "password": "secure-password", "is_active": true}'
 @app.post("/register", status_code=status.HTTP_201_CREATED, response_model=UserShow)
 async def user_registration(
-    user_data: UserCreate, connection: aiosqlite.Connection = Depends(get_db)
+    user_data: UserCreate,
+    connection: aiosqlite.Connection = Depends(pool.write_connection),
 ) -> UserShow:
     """Реєстрацію користувача в базі даних."""
-    async with connection.cursor() as cursor:
-        await cursor.execute("SELECT 1 FROM users WHERE email = ?;", (user_data.email,))
-        db_user = await cursor.fetchone()
-
-        if db_user is not None:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "User exists.")
-
-        await cursor.execute(
-            "INSERT INTO users (name, email, password, is_active) VALUES (?, ?, ?, ?) RETURNING id;",
-            (
-                user_data.name,
-                user_data.email,
-                # необхідно явно записати в БД пароль, а не *****
-                user_data.password.get_secret_value(),
-                user_data.is_active,
-            ),
-        )
-
-        last_inserted = await cursor.fetchone()
-        await connection.commit()
+    # якщо користувач з таким email вже є, запис не додається і RETURNING нічого не повертає
+    rows = await connection.execute_fetchall(
+        "INSERT INTO users (name, email, password, is_active) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (email) DO NOTHING RETURNING id;",
+        (
+            user_data.name,
+            user_data.email,
+            # необхідно явно записати в БД пароль, а не *****
+            user_data.password.get_secret_value(),
+            user_data.is_active,
+        ),
+    )
+    await connection.commit()
+    if not rows:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "User exists.")
+    last_inserted = rows[0]
 
     return UserShow(**user_data.model_dump(), id=last_inserted["id"])
 
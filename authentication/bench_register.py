@@ -0,0 +1,83 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from FastAPI.common.sqlite_pool import SQLitePool
+
+# кількість реєстрацій для кожного варіанту
+NUMBER_OF_USERS = 5_000
+
+USERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS users (
+        id        INTEGER PRIMARY KEY AUTOINCREMENT,
+        name      VARCHAR(30) NOT NULL,
+        email     VARCHAR(50) NOT NULL,
+        password  VARCHAR(30) NOT NULL,
+        is_active BOOLEAN NOT NULL CHECK (is_active IN (0, 1))
+    );
+"""
+USERS_EMAIL_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_email ON users (email);"
+
+
+async def check_then_insert(pool: SQLitePool, email: str) -> int | None:
+    """Попередній варіант: перевірка email окремим запитом, потім INSERT."""
+    async with pool.writer() as connection:
+        async with connection.cursor() as cursor:
+            await cursor.execute("SELECT 1 FROM users WHERE email = ?;", (email,))
+            if await cursor.fetchone() is not None:
+                return None
+            await cursor.execute(
+                "INSERT INTO users (name, email, password, is_active) "
+                "VALUES (?, ?, ?, ?) RETURNING id;",
+                ("John Doe", email, "secure-password", True),
+            )
+            row = await cursor.fetchone()
+            await connection.commit()
+    return row["id"]
+
+
+async def insert_on_conflict(pool: SQLitePool, email: str) -> int | None:
+    """Один запит: INSERT ... ON CONFLICT DO NOTHING RETURNING."""
+    async with pool.writer() as connection:
+        # запит і читання результату за одне звернення до потоку з'єднання
+        rows = await connection.execute_fetchall(
+            "INSERT INTO users (name, email, password, is_active) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT (email) DO NOTHING RETURNING id;",
+            ("John Doe", email, "secure-password", True),
+        )
+        await connection.commit()
+    return rows[0]["id"] if rows else None
+
+
+async def measure(pool: SQLitePool, register, emails: list[str]) -> float:
+    """Середній час однієї реєстрації в мікросекундах."""
+    start = time.perf_counter()
+    for email in emails:
+        await register(pool, email)
+    return (time.perf_counter() - start) / len(emails) * 1_000_000
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for register in (check_then_insert, insert_on_conflict):
+            path = os.path.join(directory, f"{register.__name__}.db")
+            async with SQLitePool(path) as pool:
+                async with pool.writer() as connection:
+                    await connection.execute(USERS_TABLE)
+                    await connection.execute(USERS_EMAIL_INDEX)
+                    await connection.commit()
+
+                emails = [f"user{n}@example.com" for n in range(NUMBER_OF_USERS)]
+                new_time = await measure(pool, register, emails)
+                # повторна реєстрація тих самих email
+                duplicate_time = await measure(pool, register, emails)
+
+            print(
+                f"{register.__name__}: нові користувачі {new_time:.0f} мкс, "
+                f"дублікати {duplicate_time:.0f} мкс"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
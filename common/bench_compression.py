@@ -0,0 +1,68 @@
+import json
+import time
+
+from FastAPI.common.content_encoding import ENCODERS
+
+# відповіді, схожі на відповіді додатків: список записів з БД і HTML таблиця
+NUMBER_OF_ROWS = 1000
+REPEATS = 20
+
+# рівні для порівняння: (мінімальний, за замовчуванням у middleware, максимальний)
+LEVELS = {
+    "gzip": (1, 6, 9),
+    "br": (1, 4, 11),
+    "zstd": (1, 3, 19),
+}
+
+ROWS = [
+    {
+        "id": n,
+        "name": f"Employee {n}",
+        "email": f"employee{n}@example.com",
+        "job_title": ("developer", "manager", "tester")[n % 3],
+        "salary": 1000 + n % 500,
+        "department_id": n % 10,
+    }
+    for n in range(1, NUMBER_OF_ROWS + 1)
+]
+
+PAYLOADS = {
+    "JSON": json.dumps(ROWS, separators=(",", ":")).encode(),
+    "HTML": (
+        "<table>"
+        + "".join(
+            f"<tr><td>{row['id']}</td><td>{row['name']}</td><td>{row['email']}</td>"
+            f"<td>{row['job_title']}</td><td>{row['salary']}</td></tr>"
+            for row in ROWS
+        )
+        + "</table>"
+    ).encode(),
+}
+
+
+def measure(encoding: str, level: int, payload: bytes) -> tuple[int, float]:
+    """Розмір стисненої відповіді і швидкість стиснення в Мб/с (вхідних даних)."""
+    encoder_class, _ = ENCODERS[encoding]
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        encoder = encoder_class(level)
+        compressed = encoder.compress(payload) + encoder.finish()
+    elapsed = time.perf_counter() - start
+    return len(compressed), len(payload) * REPEATS / elapsed / 1024 / 1024
+
+
+def main() -> None:
+    print(f"Доступні формати: {', '.join(ENCODERS)}")
+    for name, payload in PAYLOADS.items():
+        print(f"{name}, {NUMBER_OF_ROWS} записів, {len(payload) / 1024:.0f} Кб:")
+        for encoding in ENCODERS:
+            for level in LEVELS[encoding]:
+                size, speed = measure(encoding, level, payload)
+                print(
+                    f"  {encoding} {level:>2}: {size / 1024:6.1f} Кб "
+                    f"({len(payload) / size:4.1f}x), {speed:7.1f} Мб/с"
+                )
+
+
+if __name__ == "__main__":
+    main()
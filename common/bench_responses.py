@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from FastAPI.common.responses import FastJSONResponse, orjson
+
+# кількість записів у відповіді та кількість запитів для кожного варіанту
+NUMBER_OF_ROWS = 1000
+REQUESTS = 200
+
+
+class BookInfo(BaseModel):
+    id: int
+    title: str
+    author: str
+    year: int
+
+
+# рядки з БД у вигляді словників (як з aiomysql.DictCursor)
+ROWS = [
+    {
+        "id": n,
+        "title": f"Book {n}",
+        "author": f"Author {n % 100}",
+        "year": 1900 + n % 120,
+    }
+    for n in range(1, NUMBER_OF_ROWS + 1)
+]
+
+app = FastAPI()
+
+
+@app.get("/models/")
+async def get_models() -> list[BookInfo]:
+    """Стандартний шлях: модель для кожного рядка і повторна перевірка відповіді."""
+    return [BookInfo(**row) for row in ROWS]
+
+
+@app.get("/dicts/", response_model=list[BookInfo])
+async def get_dicts():
+    """Словники, які FastAPI перевіряє через `response_model`."""
+    return ROWS
+
+
+@app.get("/fast/", response_model=list[BookInfo])
+async def get_fast():
+    """Рядки без перевірки, закодовані через orjson."""
+    return FastJSONResponse(ROWS)
+
+
+async def measure(client: httpx.AsyncClient, url: str) -> float:
+    """Кількість запитів за секунду (без мережі: запити передаються додатку напряму)."""
+    # перший запит не рахується: FastAPI створює валідатори при першому виклику
+    await client.get(url)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = await client.get(url)
+        response.raise_for_status()
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        print(
+            f"{NUMBER_OF_ROWS} записів у відповіді, "
+            f"orjson {'встановлений' if orjson is not None else 'не встановлений'}"
+        )
+        for description, url in (
+            ("моделі Pydantic", "/models/"),
+            ("словники + response_model", "/dicts/"),
+            ("FastJSONResponse", "/fast/"),
+        ):
+            print(f"  {description}: {await measure(client, url):.0f} запитів/с")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+R = TypeVar("R")
+
+# скільки секунд з'єднання чекає на блокування БД іншим записом
+BUSY_TIMEOUT = 5.0
+
+
+@dataclass
+class DBExecutorStats:
+    """Лічильники черги виконавця: скільки запитів чекали на вільний потік і як довго."""
+
+    submitted: int = 0
+    started: int = 0
+    completed: int = 0
+    # запити, які зараз чекають на вільний потік
+    queued: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def on_submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+
+    def on_start(self, wait: float) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.started += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def on_cancel(self) -> None:
+        with self._lock:
+            self.queued -= 1
+
+    def on_done(self) -> None:
+        with self._lock:
+            self.completed += 1
+
+    def snapshot(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "started": self.started,
+                "completed": self.completed,
+                "queued": self.queued,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+                "avg_wait": self.total_wait / self.started if self.started else 0.0,
+            }
+
+
+class DBExecutor:
+    """
+    Окремий пул потоків для синхронної роботи з `sqlite3`.
+
+    Синхронні (`def`) ендпоінти FastAPI виконуються в загальному пулі потоків Starlette
+    (40 потоків) разом з іншою блокуючою роботою, і кожен відкривав нове з'єднання.
+    Тут кількість одночасних звернень до БД обмежена `max_workers`, а кожен потік
+    один раз відкриває своє з'єднання і використовує його для всіх наступних запитів.
+
+    Використання:
+        db = DBExecutor("my_db.db")
+
+        def select_user(connection: sqlite3.Connection, user_id: int): ...
+
+        @app.get("/users/{user_id}")
+        async def get_user(user_id: int):
+            return await db.run(select_user, user_id)
+    """
+
+    def __init__(
+        self,
+        database: str,
+        *,
+        max_workers: int = 4,
+        busy_timeout: float = BUSY_TIMEOUT,
+    ) -> None:
+        self.database = database
+        self.max_workers = max_workers
+        self.busy_timeout = busy_timeout
+        self.stats = DBExecutorStats()
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """З'єднання поточного потоку, яке створюється при першому зверненні."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # з'єднання використовує тільки цей потік, але закривається
+            # з потоку, який зупиняє виконавця
+            connection = sqlite3.connect(
+                self.database, timeout=self.busy_timeout, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode = WAL;")
+            connection.execute("PRAGMA synchronous = NORMAL;")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def start(self) -> None:
+        """Створює пул потоків (при старті сервера)."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="db"
+        )
+
+    def shutdown(self) -> None:
+        """Чекає на завершення запитів і закриває з'єднання всіх потоків."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def _call(
+        self,
+        submitted_at: float,
+        function: Callable[..., R],
+        *args: Any,
+        **kwargs: Any,
+    ) -> R:
+        self.stats.on_start(time.perf_counter() - submitted_at)
+        connection = self._connection()
+        try:
+            return function(connection, *args, **kwargs)
+        finally:
+            # незавершена транзакція не повинна потрапити в наступний запит цього потоку
+            if connection.in_transaction:
+                connection.rollback()
+            self.stats.on_done()
+
+    async def run(self, function: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        """
+        Виконує `function(connection, *args, **kwargs)` в потоці виконавця
+        з'єднанням цього потоку. Виняток функції передається в цикл подій як є.
+        """
+        if self._executor is None:
+            raise RuntimeError("DBExecutor is not started.")
+        self.stats.on_submit()
+        future = self._executor.submit(
+            self._call, time.perf_counter(), function, *args, **kwargs
+        )
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # клієнт відключився, поки запит чекав у черзі - потік його вже не виконає
+            if future.cancel():
+                self.stats.on_cancel()
+            raise
@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, Query, status
+
+# заголовок відповіді з курсором для запиту наступної сторінки
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Непрозорий для клієнта курсор: ID останнього запису на сторінці."""
+    data = json.dumps({"after_id": last_id}, separators=(",", ":"))
+    # без доповнення "=", щоб курсор не треба було кодувати в адресі
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Повертає ID, після якого починається наступна сторінка."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after_id = json.loads(data)["after_id"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(after_id, int) or after_id < 0:
+        raise ValueError("Invalid cursor.")
+    return after_id
+
+
+def keyset_after_id(
+    after_id: int | None = Query(
+        None,
+        ge=0,
+        title="Після ID",
+        description=(
+            "Пагінація за ключем (keyset): записи з ID, більшим за вказаний. "
+            "`after_id=0` - перша сторінка."
+        ),
+    ),
+    cursor: str | None = Query(
+        None,
+        title="Курсор",
+        description=f"Курсор наступної сторінки із заголовка `{NEXT_CURSOR_HEADER}`.",
+    ),
+) -> int | None:
+    """
+    Залежність для пагінації за ключем: `WHERE id > ? ORDER BY id LIMIT ?`
+    використовує первинний ключ і не перебирає пропущені записи, як `OFFSET`.
+    Повертає `None`, якщо клієнт не вибрав цей режим.
+    """
+    if cursor is None:
+        return after_id
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e)) from e
@@ -0,0 +1,169 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import aiosqlite
+
+# pip install aiosqlite
+
+# Налаштування кожного з'єднання пулу
+BUSY_TIMEOUT_MS = 5000  # скільки чекати на блокування БД іншим записом
+CACHE_SIZE_KIB = 16 * 1024  # кеш сторінок БД на одне з'єднання (16Mb)
+MMAP_SIZE = 256 * 1024 * 1024  # читання файлу БД через відображення в пам'ять (256Mb)
+
+
+class SQLitePool:
+    """
+    Пул довгоживучих з'єднань `aiosqlite` для одного процесу.
+
+    Кожне з'єднання `aiosqlite` - це окремий потік, тому з'єднання створюються один раз
+    при старті сервера, а не на кожен запит. SQLite дозволяє тільки один запис
+    одночасно, тому в пулі є одне з'єднання для запису (запити до нього чекають
+    по черзі) і кілька з'єднань тільки для читання, які завдяки WAL не чекають на запис.
+
+    Використання як залежностей FastAPI:
+        pool = SQLitePool("mydb.db")
+        app = FastAPI(on_startup=(pool.open,), on_shutdown=(pool.close,))
+
+        @app.get("/items/")
+        async def get_items(connection=Depends(pool.read_connection)): ...
+    """
+
+    def __init__(
+        self,
+        database: str,
+        *,
+        readers: int = 4,
+        busy_timeout: int = BUSY_TIMEOUT_MS,
+        cache_size: int = CACHE_SIZE_KIB,
+        mmap_size: int = MMAP_SIZE,
+    ) -> None:
+        self.database = database
+        self.readers = readers
+        self.busy_timeout = busy_timeout
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self._writer: aiosqlite.Connection | None = None
+        self._write_lock = asyncio.Lock()
+        self._idle_readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._connections: list[aiosqlite.Connection] = []
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, *, read_only: bool) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.database)
+        self._connections.append(connection)
+        # повертає записи з БД у вигляді словника
+        connection.row_factory = aiosqlite.Row
+        await connection.execute(f"PRAGMA busy_timeout = {self.busy_timeout};")
+        # від'ємне значення - розмір у KiB, а не в сторінках
+        await connection.execute(f"PRAGMA cache_size = -{self.cache_size};")
+        await connection.execute(f"PRAGMA mmap_size = {self.mmap_size};")
+        # з WAL синхронізації з диском при кожному COMMIT не потрібно
+        await connection.execute("PRAGMA synchronous = NORMAL;")
+        if read_only:
+            await connection.execute("PRAGMA query_only = ON;")
+        return connection
+
+    async def open(self) -> None:
+        """Відкриває з'єднання пулу (при старті сервера)."""
+        # примітиви синхронізації створюються в циклі подій, в якому працює сервер
+        self._write_lock = asyncio.Lock()
+        self._idle_readers = asyncio.Queue()
+        self._writer = await self._connect(read_only=False)
+        try:
+            # режим WAL зберігається у файлі БД, тому вмикається один раз;
+            # PRAGMA повертає рядок, і поки він не прочитаний, БД залишається заблокованою
+            await self._writer.execute_fetchall("PRAGMA journal_mode = WAL;")
+            for _ in range(self.readers):
+                self._idle_readers.put_nowait(await self._connect(read_only=True))
+        except BaseException:
+            # потоки вже відкритих з'єднань не дадуть процесу завершитись
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        """Закриває всі з'єднання пулу (після завершення роботи сервера)."""
+        for connection in self._connections:
+            await connection.close()
+        self._connections.clear()
+        self._writer = None
+
+    async def __aenter__(self) -> "SQLitePool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Бере вільне з'єднання для читання, або чекає, поки воно звільниться."""
+        if not self.is_open:
+            raise RuntimeError("SQLitePool is not open.")
+        connection = await self._idle_readers.get()
+        try:
+            yield connection
+        finally:
+            self._idle_readers.put_nowait(connection)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        З'єднання для запису, яке одночасно використовує тільки один запит.
+        Незавершена (без `commit`) транзакція відкочується, щоб не потрапити в наступний запит.
+        """
+        if not self.is_open:
+            raise RuntimeError("SQLitePool is not open.")
+        async with self._write_lock:
+            try:
+                yield self._writer
+            finally:
+                if self._writer.in_transaction:
+                    await self._writer.rollback()
+
+    async def read_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Залежність FastAPI: з'єднання тільки для читання на час запиту."""
+        async with self.reader() as connection:
+            yield connection
+
+    async def write_connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Залежність FastAPI: з'єднання для запису на час запиту."""
+        async with self.writer() as connection:
+            yield connection
+
+
+async def create_unique_index(
+    connection: aiosqlite.Connection, index: str, table: str, column: str
+) -> None:
+    """
+    Створення унікального індексу `index` на `table (column)`, якщо його ще немає.
+
+    В існуючій БД вже можуть бути дублікати, через які `CREATE UNIQUE INDEX`
+    падає з `IntegrityError`. Тому спочатку шукаються дублікати і, якщо вони є,
+    сервер не стартує з поясненням, які записи треба виправити.
+    """
+    exists = await connection.execute_fetchall(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?;", (index,)
+    )
+    if exists:
+        return
+
+    duplicates = await connection.execute_fetchall(
+        f"SELECT {column}, COUNT(*) FROM {table} "
+        f"GROUP BY {column} HAVING COUNT(*) > 1 LIMIT 5;"
+    )
+    if duplicates:
+        found = ", ".join(f"{row[0]!r} ({row[1]} times)" for row in duplicates)
+        raise RuntimeError(
+            f"Cannot create unique index {index}: table {table} has duplicate "
+            f"{column} values: {found}. Remove or rename the duplicates, "
+            f"e.g. DELETE FROM {table} WHERE rowid NOT IN "
+            f"(SELECT MIN(rowid) FROM {table} GROUP BY {column}), and restart."
+        )
+
+    await connection.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({column});"
+    )
@@ -1,12 +1,26 @@
+import json
 import os
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
 
 import aiomysql
+from bulk import BulkResult, InvalidItem, bulk_request_body, iter_chunks
+from cache import LRUCache, ReadThroughCache
+from content_encoding import CompressionMiddleware
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from etag import (
+    NO_CACHE,
+    ETagMiddleware,
+    not_modified,
+    parse_version_etag,
+    version_etag,
+)
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_after_id
+from pydantic import BaseModel, Field
+from responses import FastJSONResponse
 
 load_dotenv(".env")
 
@@ -19,6 +33,21 @@ MYSQL_CONNECTION_DATA = {
 }
 
 
+# кеш книг за ID: читань значно більше, ніж змін, а зміни видаляють книгу з кешу.
+# Для кількох процесів сервера LRUCache можна замінити на зовнішній кеш (CacheBackend)
+BOOK_CACHE_SIZE = int(os.environ.get("BOOK_CACHE_SIZE", 10_000))
+BOOK_CACHE_TTL = float(os.environ.get("BOOK_CACHE_TTL", 60))
+book_cache = ReadThroughCache(LRUCache(BOOK_CACHE_SIZE), ttl=BOOK_CACHE_TTL)
+
+# стиснення відповідей: мінімальний розмір у байтах і рівень gzip (1 - швидко, 9 - менше)
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+
+
+# довжина колонок `title` і `author` (VARCHAR) в таблиці books
+TEXT_MAX_LENGTH = 50
+
+
 async def get_mysql_connection() -> aiomysql.Connection:
     """Створення та повернення з'єднання."""
     return await aiomysql.connect(**MYSQL_CONNECTION_DATA)
@@ -27,8 +56,9 @@ async def get_mysql_connection() -> aiomysql.Connection:
 class Book(BaseModel):
     """Базова модель книги."""
 
-    title: str
-    author: str
+    # довше значення MySQL відхилить з DataError, тому воно перевіряється заздалегідь
+    title: str = Field(max_length=TEXT_MAX_LENGTH)
+    author: str = Field(max_length=TEXT_MAX_LENGTH)
     year: int
 
 
@@ -39,13 +69,21 @@ class BookInfo(Book):
     title: str
     author: str
     year: int
+    # збільшується при кожній зміні книги; використовується як ETag
+    version: int = 1
+
+
+class BookBulkUpdate(Book):
+    """Модель книги для масового оновлення: ID і всі поля книги."""
+
+    id: int
 
 
 class BookUpdate(BaseModel):
     """Модель книги для оновлення."""
 
-    title: str | None = None
-    author: str | None = None
+    title: str | None = Field(default=None, max_length=TEXT_MAX_LENGTH)
+    author: str | None = Field(default=None, max_length=TEXT_MAX_LENGTH)
     year: int | None = None
 
 
@@ -73,10 +111,36 @@ async def create_tables(_: FastAPI):
                 title VARCHAR(50),
                 author VARCHAR(50),
                 year INTEGER,
-                PRIMARY KEY(id)
+                version INT NOT NULL DEFAULT 1,
+                PRIMARY KEY(id),
+                UNIQUE KEY ux_books_title (title)
             );
             """
         )
+        # унікальний індекс для таблиці, створеної до його появи
+        await cursor.execute(
+            """
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'books'
+            AND index_name = 'ux_books_title';
+            """
+        )
+        if await cursor.fetchone() is None:
+            await cursor.execute(
+                "ALTER TABLE books ADD UNIQUE KEY ux_books_title (title);"
+            )
+        # колонка версії для таблиці, створеної до її появи
+        await cursor.execute(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'books'
+            AND column_name = 'version';
+            """
+        )
+        if await cursor.fetchone() is None:
+            await cursor.execute(
+                "ALTER TABLE books ADD COLUMN version INT NOT NULL DEFAULT 1;"
+            )
         await connection.commit()
 
     yield
@@ -90,6 +154,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # дозволяємо фронтенду прочитати курсор наступної сторінки і версію книги (ETag)
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+)
+# ETag для GET відповідей; книга по ID може використовуватись з кешу клієнта 30 секунд
+app.add_middleware(
+    ETagMiddleware,
+    cache_control={"/books/": NO_CACHE, "/books/{book_id}": "private, max-age=30"},
+)
+# стиснення - зовнішній шар: CORS заголовки додаються до того, як тіло стискається
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    levels={"gzip": GZIP_LEVEL},
 )
 
 
@@ -100,46 +177,285 @@ async def create_book(book: Book) -> BookInfo:
 
     try:
         async with connection.cursor() as cursor:
-            # перевіряємо наявність в БД книги з переданою назвою
-            await cursor.execute("SELECT 1 FROM books WHERE title=%s;", (book.title,))
-            db_book = await cursor.fetchone()
-
-            if db_book is not None:
-                raise HTTPException(400, "Book is already exists.")
-
-            # створюємо книгу, якщо її не знайшлось в БД
+            # створюємо книгу одним запитом: якщо книга з такою назвою вже є
+            # (унікальний ключ), рядок не змінюється і кількість змінених рядків - 0.
+            # На відміну від INSERT IGNORE, інші помилки (наприклад, задовга назва)
+            # не перетворюються на попередження
             await cursor.execute(
-                "INSERT INTO books (title, author, year) VALUES (%s, %s, %s);",
+                "INSERT INTO books (title, author, year) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE id = id;",
                 (
                     book.title,
                     book.author,
                     book.year,
                 ),
             )
+            if cursor.rowcount == 0:
+                raise HTTPException(400, "Book is already exists.")
             await connection.commit()
-            # дістаємо останній ID книги, яку додали (працює лише в MySQL)
-            await cursor.execute("SELECT LAST_INSERT_ID();")
-            user_id = await cursor.fetchone()
+            # ID книги, яку додали, повертається разом з відповіддю на INSERT
+            book_id = cursor.lastrowid
     except aiomysql.Error as e:
         raise e
     finally:
         # в будь-якому випадку закриваємо з'єднання
         await connection.ensure_closed()
 
-    return BookInfo(**book.model_dump(), id=user_id[0])
+    return BookInfo(**book.model_dump(), id=book_id)
+
+
+def in_placeholders(values: list) -> str:
+    """Параметри для `IN (...)`: `%s, %s, ...` за кількістю значень."""
+    return ", ".join(["%s"] * len(values))
+
+
+def insert_outcomes(
+    count: int, existing: set[int], ids: dict[int, int]
+) -> list[int | InvalidItem]:
+    """
+    Результат для кожної з `count` книг партії: ID нової книги або помилка.
+    `existing` - номери книг, назви яких вже були в БД до INSERT, `ids` - номер
+    першої книги партії з назвою рядка -> ID рядка після INSERT. Решта книг
+    повторюють назву, яка вже була в БД або в попередній книзі партії.
+    """
+    return [
+        (
+            ids[n]
+            if n in ids and n not in existing
+            else InvalidItem("Book is already exists.")
+        )
+        for n in range(count)
+    ]
+
+
+async def insert_books(
+    connection: aiomysql.Connection, books: list[Book]
+) -> list[int | InvalidItem]:
+    """
+    Додає партію книг однією транзакцією і повертає ID кожної книги
+    або помилку, якщо книга з такою назвою вже є.
+    """
+    titles = [book.title for book in books]
+    # назви порівнює сама БД правилами (collation) колонки `title`, які можуть не
+    # враховувати регістр, діакритику і пробіли в кінці: FIELD - номер першої книги
+    # партії з назвою рядка, а IN - пошук за унікальним ключем
+    matches = (
+        f"SELECT FIELD(title, {in_placeholders(titles)}) - 1, id FROM books "
+        f"WHERE title IN ({in_placeholders(titles)})"
+    )
+    async with connection.cursor() as cursor:
+        # блокує знайдені назви і проміжки між ними до завершення транзакції,
+        # щоб паралельний запит не додав ті самі книги
+        await cursor.execute(f"{matches} FOR UPDATE;", titles * 2)
+        existing = {n for n, _ in await cursor.fetchall()}
+
+        new_books = [book for n, book in enumerate(books) if n not in existing]
+        ids = {}
+        if new_books:
+            # executemany для INSERT ... VALUES формує один запит з усіма рядками;
+            # повтор назви не відкочує партію: рядок лишається від першої книги
+            await cursor.executemany(
+                "INSERT INTO books (title, author, year) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE id = id;",
+                [(book.title, book.author, book.year) for book in new_books],
+            )
+            await cursor.execute(f"{matches};", titles * 2)
+            ids = dict(await cursor.fetchall())
+    await connection.commit()
+
+    return insert_outcomes(len(books), existing, ids)
+
+
+async def update_books(
+    connection: aiomysql.Connection, books: list[BookBulkUpdate]
+) -> list[int | InvalidItem]:
+    """Оновлює партію книг однією транзакцією і повертає ID або помилку для кожної."""
+    book_ids = list({book.id for book in books})
+    async with connection.cursor() as cursor:
+        await cursor.execute(
+            f"SELECT id FROM books WHERE id IN ({in_placeholders(book_ids)}) FOR UPDATE;",
+            book_ids,
+        )
+        existing = {book_id for (book_id,) in await cursor.fetchall()}
+
+        # якщо ID повторюється в запиті, застосовується останнє оновлення
+        updates = {book.id: book for book in books if book.id in existing}
+        if updates:
+            await cursor.executemany(
+                "UPDATE books SET title=%s, author=%s, year=%s, version = version + 1 "
+                "WHERE id=%s;",
+                [
+                    (book.title, book.author, book.year, book.id)
+                    for book in updates.values()
+                ],
+            )
+    await connection.commit()
+    await book_cache.invalidate(*existing)
+
+    return [
+        book.id if book.id in existing else InvalidItem("Book does not exist.")
+        for book in books
+    ]
+
+
+async def delete_books(
+    connection: aiomysql.Connection, book_ids: list[int]
+) -> list[int | InvalidItem]:
+    """Видаляє партію книг одним запитом і повертає ID або помилку для кожної."""
+    unique_ids = list(set(book_ids))
+    async with connection.cursor() as cursor:
+        await cursor.execute(
+            f"SELECT id FROM books WHERE id IN ({in_placeholders(unique_ids)}) FOR UPDATE;",
+            unique_ids,
+        )
+        existing = {book_id for (book_id,) in await cursor.fetchall()}
+        if existing:
+            await cursor.execute(
+                f"DELETE FROM books WHERE id IN ({in_placeholders(list(existing))});",
+                list(existing),
+            )
+    await connection.commit()
+    await book_cache.invalidate(*existing)
+
+    return [
+        book_id if book_id in existing else InvalidItem("Book does not exist.")
+        for book_id in book_ids
+    ]
+
+
+async def run_bulk(
+    request: Request,
+    item_type: type,
+    write_chunk: Callable[
+        [aiomysql.Connection, list], Awaitable[list[int | InvalidItem]]
+    ],
+) -> BulkResult:
+    """
+    Масова операція: елементи тіла запиту читаються, перевіряються і записуються
+    партіями по `BULK_CHUNK_SIZE`, кожна партія - окрема транзакція.
+    """
+    result = BulkResult()
+    connection = await get_mysql_connection()
+
+    try:
+        async for chunk in iter_chunks(request, item_type):
+            valid = [item for item in chunk if not isinstance(item, InvalidItem)]
+            try:
+                outcomes = iter(await write_chunk(connection, valid) if valid else ())
+            except (aiomysql.IntegrityError, aiomysql.DataError) as e:
+                # наприклад, нова назва книги вже зайнята або рік не вміщається в INT:
+                # відкочується вся партія, а наступні партії записуються далі
+                await connection.rollback()
+                error = InvalidItem(f"Chunk is not saved: {e.args[-1]}")
+                outcomes = iter([error] * len(valid))
+
+            for item in chunk:
+                result.add(item if isinstance(item, InvalidItem) else next(outcomes))
+    finally:
+        # в будь-якому випадку закриваємо з'єднання
+        await connection.ensure_closed()
+
+    return result
+
+
+# curl -X POST http://127.0.0.1:8000/books/bulk \
+# -H 'Content-Type: application/x-ndjson' --data-binary @books.ndjson
+@app.post("/books/bulk", openapi_extra=bulk_request_body(Book))
+async def create_books_bulk(request: Request) -> BulkResult:
+    """
+    Масове створення книг: JSON масив або NDJSON (одна книга на рядок).
+    Повертає ID кожної книги або помилку для неї за індексом в запиті.
+    """
+    return await run_bulk(request, Book, insert_books)
 
 
-@app.get("/books/")
+@app.put("/books/bulk", openapi_extra=bulk_request_body(BookBulkUpdate))
+async def update_books_bulk(request: Request) -> BulkResult:
+    """Масове оновлення книг: елементи з ID та всіма полями книги."""
+    return await run_bulk(request, BookBulkUpdate, update_books)
+
+
+@app.delete("/books/bulk", openapi_extra=bulk_request_body(int))
+async def delete_books_bulk(request: Request) -> BulkResult:
+    """Масове видалення книг: масив або NDJSON з ID книг."""
+    return await run_bulk(request, int, delete_books)
+
+
+# скільки рядків читається з серверного курсора і кодується в JSON за раз
+STREAM_BATCH_SIZE = 1000
+
+
+async def stream_rows(
+    connection: aiomysql.Connection, cursor: aiomysql.SSDictCursor
+) -> AsyncIterator[bytes]:
+    """
+    JSON масив рядків курсора, який формується частинами по мірі читання з БД.
+    Рядки кодуються в JSON напряму, без створення моделі для кожного.
+    """
+    finished = False
+    try:
+        yield b"["
+        separator = ""
+        while rows := await cursor.fetchmany(STREAM_BATCH_SIZE):
+            chunk = ",".join(json.dumps(row, ensure_ascii=False) for row in rows)
+            yield (separator + chunk).encode()
+            separator = ","
+        yield b"]"
+        finished = True
+    finally:
+        if finished:
+            await cursor.close()
+            await connection.ensure_closed()
+        else:
+            # клієнт відключився: непрочитані рядки не дочитуються, а з'єднання
+            # закривається одразу
+            connection.close()
+
+
+@app.get("/books/", response_model=list[BookInfo])
 async def get_books(
     limit: int = Query(default=100, description="Кількість книг для отримання."),
-) -> list[BookInfo]:
-    """Отримання інформації про всіх користувачів."""
+    after_id: int | None = Depends(keyset_after_id),
+    stream: bool = Query(
+        default=False,
+        description=(
+            "Потокова відповідь для великих `limit`: книги передаються по мірі "
+            "читання з БД, без заголовка `X-Next-Cursor`."
+        ),
+    ),
+) -> FastJSONResponse | StreamingResponse:
+    """
+    Отримання інформації про всіх користувачів.
+    З `after_id` або `cursor` книги вибираються посторінково за ключем (ID),
+    а курсор наступної сторінки повертається в заголовку `X-Next-Cursor`.
+    """
+    if after_id is not None:
+        query = "SELECT * FROM books WHERE id > %s ORDER BY id LIMIT %s;"
+        params = (after_id, limit)
+    else:
+        query = "SELECT * FROM books LIMIT %s;"
+        params = (limit,)
+
     connection = await get_mysql_connection()
 
+    if stream:
+        try:
+            # серверний курсор: рядки читаються з з'єднання частинами,
+            # а не завантажуються в пам'ять всі одразу
+            cursor = await connection.cursor(aiomysql.SSDictCursor)
+            await cursor.execute(query, params)
+        except BaseException:
+            connection.close()
+            raise
+        # з'єднання закривається після відправлення відповіді
+        return StreamingResponse(
+            stream_rows(connection, cursor), media_type="application/json"
+        )
+
     try:
         # aiomysql.DictCursor курсор, який повертає дані з БД в вигляді словника
         async with connection.cursor(aiomysql.DictCursor) as cursor:
-            await cursor.execute("SELECT * FROM books LIMIT %s;", (limit,))
+            await cursor.execute(query, params)
             db_books = await cursor.fetchall()
     except aiomysql.Error as e:
         raise e
@@ -147,83 +463,196 @@ async def get_books(
         # в будь-якому випадку закриваємо з'єднання
         await connection.ensure_closed()
 
-    return [BookInfo(**data) for data in db_books]
+    headers = {}
+    if after_id is not None and db_books and len(db_books) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(db_books[-1]["id"])
 
+    # рядки таблиці books вже мають типи BookInfo, тому модель для кожного не створюється
+    return FastJSONResponse(db_books, headers=headers)
 
-@app.get("/books/{book_id}")
-async def get_book(book_id: int) -> BookInfo:
-    """Отримання інформації про всіх користувачів."""
+
+async def load_book(book_id: int) -> dict | None:
+    """Книга з БД по `book_id` або `None`, якщо її немає."""
     connection = await get_mysql_connection()
 
     try:
         # aiomysql.DictCursor курсор, який повертає дані з БД в вигляді словника
         async with connection.cursor(aiomysql.DictCursor) as cursor:
             await cursor.execute("SELECT * FROM books WHERE id=%s", book_id)
-            db_book = await cursor.fetchone()
-
-            if db_book is None:
-                raise HTTPException(404, "Book does not exist.")
-
+            return await cursor.fetchone()
     except aiomysql.Error as e:
         raise e
     finally:
         # в будь-якому випадку закриваємо з'єднання
         await connection.ensure_closed()
 
+
+@app.get("/books/{book_id}")
+async def get_book(book_id: int, request: Request, response: Response) -> BookInfo:
+    """
+    Отримання інформації про книгу (з кешу, якщо вона вже читалась).
+    Якщо книга не змінилась з попереднього запиту (`If-None-Match`), відповідь 304.
+    """
+    db_book = await book_cache.get(book_id, lambda: load_book(book_id))
+
+    if db_book is None:
+        raise HTTPException(404, "Book does not exist.")
+
+    # ETag з версії книги: при збігу модель не створюється і відповідь не серіалізується
+    etag = version_etag(db_book["version"])
+    if not_modified_response := not_modified(request, etag):
+        return not_modified_response
+    response.headers["ETag"] = etag
     return BookInfo(**db_book)
 
 
-@app.put("/books/{book_id}")
-async def update_book(book_id: int, update_data: BookUpdate) -> BookInfo:
-    """Оновлення даних книги по `book_id`."""
-    connection = await get_mysql_connection()
+@app.get("/cache/stats")
+async def get_cache_stats() -> dict[str, int | float]:
+    """Лічильники кешу книг: влучання, промахи та кількість читань з БД."""
+    return book_cache.stats.snapshot()
 
-    try:
-        async with connection.cursor(aiomysql.DictCursor) as cursor:
-            # перевіряємо наявність в БД книги з переданим ID
-            await cursor.execute("SELECT * FROM books WHERE id=%s;", (book_id,))
+
+def if_match_version(
+    if_match: str | None = Header(
+        None,
+        description=(
+            'ETag книги (`W/"<version>"`): зміна виконується, тільки якщо книга '
+            "не змінилась після її читання, інакше відповідь 412."
+        ),
+    ),
+) -> int | None:
+    """
+    Версія книги із заголовка `If-Match` або `None`, якщо книга змінюється без
+    перевірки версії (заголовка немає або він `*`).
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    version = parse_version_etag(if_match)
+    if version is None:
+        # ETag не відповідає жодній версії книги
+        raise HTTPException(412, "Book has been modified.")
+    return version
+
+
+def version_conflict(version: int) -> HTTPException:
+    """Помилка 412 з поточною версією книги, щоб клієнт міг перечитати її."""
+    return HTTPException(
+        412, "Book has been modified.", headers={"ETag": version_etag(version)}
+    )
+
+
+async def update_book_row(
+    connection: aiomysql.Connection,
+    book_id: int,
+    values: dict,
+    expected_version: int | None = None,
+) -> dict | None:
+    """
+    Оновлює поля `values` книги і повертає збережений рядок або `None`, якщо книги немає.
+
+    MySQL не підтримує `UPDATE ... RETURNING`, тому `UPDATE` і `SELECT` оновленого рядка
+    відправляються разом (aiomysql дозволяє кілька запитів через `;`) і виконуються
+    в одній транзакції: сервер відповідає на обидва за одне звернення.
+
+    Кожна зміна збільшує версію книги. З `expected_version` книга змінюється, тільки
+    якщо її версія та сама (оптимістичне блокування: без `SELECT ... FOR UPDATE`),
+    інакше - помилка 412.
+    """
+    # формуємо строку із назвами полів для оновлення у вигляді (title=%s, author=%s)
+    set_clauses = ", ".join(f"{field}=%s" for field in values)
+    query = "SELECT * FROM books WHERE id=%s;"
+    params = [book_id]
+    if values:
+        condition = "id=%s"
+        update_params = [*values.values(), book_id]
+        if expected_version is not None:
+            condition += " AND version=%s"
+            update_params.append(expected_version)
+        query = (
+            f"UPDATE books SET {set_clauses}, version = version + 1 "
+            f"WHERE {condition}; " + query
+        )
+        params = [*update_params, *params]
+
+    async with connection.cursor(aiomysql.DictCursor) as cursor:
+        try:
+            await cursor.execute(query, params)
+            # версія змінюється завжди, тому 0 - книги немає або її версія інша
+            updated = cursor.rowcount
+            if values:
+                # перехід від результату UPDATE до результату SELECT
+                await cursor.nextset()
             db_book = await cursor.fetchone()
+        except aiomysql.IntegrityError as e:
+            await connection.rollback()
+            raise HTTPException(400, "Book is already exists.") from e
+    await connection.commit()
+    await book_cache.invalidate(book_id)
 
-            if db_book is None:
-                raise HTTPException(404, "Book does not exist.")
+    if db_book is not None and expected_version is not None:
+        applied = updated > 0 if values else db_book["version"] == expected_version
+        if not applied:
+            raise version_conflict(db_book["version"])
 
-            # оновлюємо дані книги
-            await cursor.execute(
-                "UPDATE books SET title=%s, author=%s, year=%s WHERE id=%s",
-                (
-                    update_data.title,
-                    update_data.author,
-                    update_data.year,
-                    book_id,
-                ),
-            )
-            await connection.commit()
+    return db_book
+
+
+@app.put("/books/{book_id}")
+async def update_book(
+    book_id: int,
+    update_data: Book,
+    response: Response,
+    expected_version: int | None = Depends(if_match_version),
+) -> BookInfo:
+    """Оновлення всіх даних книги по `book_id` (з `If-Match` - тільки незміненої)."""
+    connection = await get_mysql_connection()
+
+    try:
+        db_book = await update_book_row(
+            connection, book_id, update_data.model_dump(), expected_version
+        )
     except aiomysql.Error as e:
         raise e
     finally:
         # в будь-якому випадку закриваємо з'єднання
         await connection.ensure_closed()
 
-    return BookInfo(**update_data.model_dump(), id=db_book["id"])
+    if db_book is None:
+        raise HTTPException(404, "Book does not exist.")
+
+    response.headers["ETag"] = version_etag(db_book["version"])
+    return BookInfo(**db_book)
 
 
 @app.delete("/books/{book_id}", response_class=JSONResponse, status_code=204)
-async def delete_book(book_id: int) -> None:
-    """Видалення книги по `book_id`."""
+async def delete_book(
+    book_id: int, expected_version: int | None = Depends(if_match_version)
+) -> None:
+    """Видалення книги по `book_id` (з `If-Match` - тільки незміненої)."""
     connection = await get_mysql_connection()
 
     try:
         async with connection.cursor(aiomysql.DictCursor) as cursor:
             # перевіряємо наявність в БД книги з переданим ID
-            await cursor.execute("SELECT 1 FROM books WHERE id=%s;", (book_id,))
+            await cursor.execute("SELECT version FROM books WHERE id=%s;", (book_id,))
             db_book = await cursor.fetchone()
 
             if db_book is None:
                 raise HTTPException(404, "Book does not exist.")
 
             # видаляємо книгу
-            await cursor.execute("DELETE FROM books WHERE id=%s", (book_id,))
+            if expected_version is None:
+                await cursor.execute("DELETE FROM books WHERE id=%s", (book_id,))
+            else:
+                # версія перевіряється в самому DELETE: книгу могли змінити після SELECT
+                await cursor.execute(
+                    "DELETE FROM books WHERE id=%s AND version=%s",
+                    (book_id, expected_version),
+                )
+                if cursor.rowcount == 0:
+                    raise version_conflict(db_book["version"])
             await connection.commit()
+            await book_cache.invalidate(book_id)
     except aiomysql.Error as e:
         raise e
     finally:
@@ -232,38 +661,31 @@ async def delete_book(book_id: int) -> None:
 
 
 @app.patch("/books/{book_id}")
-async def update_book_partial(book_id: int, update_data: BookUpdate) -> BookInfo:
-    """Часткове оновлення даних книги по `book_id`."""
+async def update_book_partial(
+    book_id: int,
+    update_data: BookUpdate,
+    response: Response,
+    expected_version: int | None = Depends(if_match_version),
+) -> BookInfo:
+    """Часткове оновлення даних книги по `book_id` (з `If-Match` - тільки незміненої)."""
     connection = await get_mysql_connection()
 
     try:
-        async with connection.cursor(aiomysql.DictCursor) as cursor:
-            # перевіряємо наявність в БД книги з переданим ID
-            await cursor.execute("SELECT * FROM books WHERE id=%s;", (book_id,))
-            db_book: dict = await cursor.fetchone()
-
-            if db_book is None:
-                raise HTTPException(404, "Book does not exist.")
-
-            # залишаємо тільки ті дані, які треба оновити
-            updated_item = update_data.model_dump(exclude_unset=True)
-            # формуємо строку із назвами полів для оновлення у вигляді (title=%s, author=%s)
-            set_clauses = ",".join(f"{field}=%s" for field in updated_item.keys())
-            # значення для оновлення
-            values = list(updated_item.values())
-
-            # оновлюємо дані книги
-            await cursor.execute(
-                f"UPDATE books SET {set_clauses} WHERE id=%s;",
-                values + [book_id],
-            )
-            await connection.commit()
+        # залишаємо тільки ті дані, які треба оновити
+        db_book = await update_book_row(
+            connection,
+            book_id,
+            update_data.model_dump(exclude_unset=True),
+            expected_version,
+        )
     except aiomysql.Error as e:
         raise e
     finally:
         # в будь-якому випадку закриваємо з'єднання
         await connection.ensure_closed()
 
-    # оновлюємо дані книги для відповіді
-    db_book.update(**updated_item)
+    if db_book is None:
+        raise HTTPException(404, "Book does not exist.")
+
+    response.headers["ETag"] = version_etag(db_book["version"])
     return BookInfo(**db_book)
@@ -0,0 +1,141 @@
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+# скільки елементів валідується і записується в БД однією транзакцією
+BULK_CHUNK_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@dataclass
+class InvalidItem:
+    """Елемент, який не вдалось прочитати або перевірити: повідомлення про помилку."""
+
+    error: str
+
+
+class BulkResult(BaseModel):
+    """
+    Результат масової операції. `ids[i]` - ID запису для i-го елемента запиту
+    або `null`, якщо для нього сталась помилка, а текст помилки - в `errors[i]`.
+    """
+
+    succeeded: int = 0
+    failed: int = 0
+    ids: list[int | None] = []
+    errors: dict[int, str] = {}
+
+    def add(self, outcome: int | InvalidItem) -> None:
+        """Додає результат наступного елемента запиту."""
+        if isinstance(outcome, InvalidItem):
+            self.errors[len(self.ids)] = outcome.error
+            self.ids.append(None)
+            self.failed += 1
+        else:
+            self.ids.append(outcome)
+            self.succeeded += 1
+
+
+def bulk_request_body(model: type[BaseModel] | type) -> dict[str, Any]:
+    """Опис тіла запиту для OpenAPI: JSON масив або NDJSON з елементами `model`."""
+    item_schema = TypeAdapter(model).json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": item_schema}},
+                NDJSON_MEDIA_TYPE: {"schema": item_schema},
+            },
+        }
+    }
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    """Елементи NDJSON тіла, які читаються по мірі надходження, а не всім тілом."""
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_line(line)
+    if buffer.strip():
+        yield parse_line(buffer)
+
+
+def parse_line(line: bytes) -> Any:
+    """Елемент з одного рядка NDJSON або `InvalidItem`, якщо це не JSON."""
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return InvalidItem(f"Invalid JSON: {e}")
+
+
+async def iter_items(request: Request) -> AsyncIterator[Any]:
+    """Елементи тіла запиту: JSON масив або NDJSON (один JSON об'єкт на рядок)."""
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        async for item in iter_ndjson(request):
+            yield item
+        return
+
+    try:
+        items = await request.json()
+    except ValueError as e:
+        raise HTTPException(400, "Invalid JSON.") from e
+    if not isinstance(items, list):
+        raise HTTPException(422, "Expected a JSON array.")
+    for item in items:
+        yield item
+
+
+def validation_error(error: ValidationError) -> str:
+    """Перша помилка валідації елемента у вигляді `поле: повідомлення`."""
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first["loc"])
+    return f"{field}: {first['msg']}" if field else first["msg"]
+
+
+def validate_chunk(
+    chunk_adapter: TypeAdapter, item_adapter: TypeAdapter, items: list[Any]
+) -> list[Any]:
+    """
+    Перевіряє партію елементів одним викликом валідатора. Елементи з помилками
+    замінюються на `InvalidItem`, решта - перевірені значення.
+    """
+    if not any(isinstance(item, InvalidItem) for item in items):
+        try:
+            return chunk_adapter.validate_python(items)
+        except ValidationError:
+            pass
+
+    # в партії є помилки, тому кожен елемент перевіряється окремо
+    result = []
+    for item in items:
+        if isinstance(item, InvalidItem):
+            result.append(item)
+            continue
+        try:
+            result.append(item_adapter.validate_python(item))
+        except ValidationError as e:
+            result.append(InvalidItem(validation_error(e)))
+    return result
+
+
+async def iter_chunks(
+    request: Request, item_type: type, size: int = BULK_CHUNK_SIZE
+) -> AsyncIterator[list[Any]]:
+    """Партії елементів тіла запиту по `size`, вже перевірені на відповідність `item_type`."""
+    chunk_adapter = TypeAdapter(list[item_type])
+    item_adapter = TypeAdapter(item_type)
+    chunk = []
+    async for item in iter_items(request):
+        chunk.append(item)
+        if len(chunk) == size:
+            yield validate_chunk(chunk_adapter, item_adapter, chunk)
+            chunk = []
+    if chunk:
+        yield validate_chunk(chunk_adapter, item_adapter, chunk)
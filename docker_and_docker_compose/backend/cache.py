@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import asdict, dataclass
+from typing import Any, Protocol, TypeVar
+
+V = TypeVar("V")
+
+# значення, якого немає в кеші (None - звичайне значення)
+MISSING = object()
+
+
+class CacheBackend(Protocol):
+    """
+    Сховище кешу. Окрім `LRUCache` в пам'яті процесу, це може бути зовнішній кеш
+    (наприклад, Redis), спільний для всіх процесів сервера: `get` повертає `MISSING`,
+    якщо значення немає, а `set` зберігає значення на `ttl` секунд.
+    """
+
+    async def get(self, key: Hashable) -> Any: ...
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None: ...
+
+    async def delete(self, key: Hashable) -> None: ...
+
+
+class LRUCache:
+    """Кеш в пам'яті процесу: не більше `max_size` значень, кожне живе `ttl` секунд."""
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self.max_size = max_size
+        # ключ -> (час, до якого значення дійсне, значення); останні використані - в кінці
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: Hashable) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return MISSING
+        self._items.move_to_end(key)
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            # витісняється значення, яке найдовше не використовувалось
+            self._items.popitem(last=False)
+
+    async def delete(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+
+@dataclass
+class CacheStats:
+    """Лічильники кешу: `loads` - скільки разів дані читались з БД."""
+
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    invalidations: int = 0
+
+    def snapshot(self) -> dict[str, int | float]:
+        requests = self.hits + self.misses
+        return {**asdict(self), "hit_ratio": self.hits / requests if requests else 0.0}
+
+
+class ReadThroughCache:
+    """
+    Кеш з читанням через нього: при відсутності значення воно завантажується
+    функцією `load` і зберігається в `backend`.
+
+    Одночасні запити одного ключа, якого немає в кеші, чекають на одне завантаження,
+    а не відправляють кожен свій запит до БД. `None` (запису немає) не кешується.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 60.0) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = CacheStats()
+        # ключ -> завантаження, яке зараз виконується
+        self._loading: dict[Hashable, asyncio.Future] = {}
+        # посилання на задачі завантаження, щоб їх не видалив збирач сміття
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[V]]) -> V:
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.stats.hits += 1
+            return value
+        self.stats.misses += 1
+
+        loading = self._loading.get(key)
+        if loading is None:
+            loading = asyncio.get_running_loop().create_future()
+            self._loading[key] = loading
+            # завантаження - окрема задача, тому скасування запиту, який його
+            # почав, не скасовує його для інших запитів
+            task = asyncio.create_task(self._load(key, load, loading))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(loading)
+
+    async def _load(
+        self, key: Hashable, load: Callable[[], Awaitable[V]], loading: asyncio.Future
+    ) -> None:
+        self.stats.loads += 1
+        try:
+            value = await load()
+            # якщо під час завантаження дані змінили, значення вже застаріле
+            if value is not None and self._loading.get(key) is loading:
+                await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            loading.set_exception(e)
+        else:
+            loading.set_result(value)
+        finally:
+            if self._loading.get(key) is loading:
+                del self._loading[key]
+
+    async def invalidate(self, *keys: Hashable) -> None:
+        """Видаляє значення після зміни даних."""
+        for key in keys:
+            self.stats.invalidations += 1
+            # наступний запит завантажить нове значення, а не дочекається старого
+            self._loading.pop(key, None)
+            await self.backend.delete(key)
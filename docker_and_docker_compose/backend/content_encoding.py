@@ -0,0 +1,235 @@
+# Копія `common/content_encoding.py`: контекст збірки Docker образу - тільки папка `backend`.
+import zlib
+from collections.abc import Callable
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pip install zstandard
+    zstandard = None
+
+# типи вмісту, які стискаються: текст, JSON, NDJSON, HTML, XML
+COMPRESSIBLE_MEDIA_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+)
+# менші відповіді не стискаються: виграш менший за витрати на стиснення і заголовки
+MINIMUM_SIZE = 1024
+
+
+class Encoder(Protocol):
+    """
+    Потоковий кодувальник одного формату стиснення: `compress` стискає частину
+    відповіді і повертає все, що вже можна відправити, а `finish` - кінець потоку.
+    """
+
+    def compress(self, data: bytes) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class GzipEncoder:
+    def __init__(self, level: int) -> None:
+        # 16 + MAX_WBITS - формат gzip (заголовок і контрольна сума), а не просто deflate
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH віддає стиснені дані одразу, щоб потокова відповідь
+        # доходила до клієнта частинами, а не тільки після завершення
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# формат -> (кодувальник, рівень стиснення за замовчуванням); тільки доступні формати
+ENCODERS: dict[str, tuple[Callable[[int], Encoder], int]] = {
+    "gzip": (GzipEncoder, 6),
+}
+if brotli is not None:
+    # рівні 10-11 стискають краще, але в десятки разів повільніше
+    ENCODERS["br"] = (BrotliEncoder, 4)
+if zstandard is not None:
+    ENCODERS["zstd"] = (ZstdEncoder, 3)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Формати із заголовка `Accept-Encoding` і їх вага (q)."""
+    accepted = {}
+    for part in header.split(","):
+        encoding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if encoding:
+            accepted[encoding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(header: str, preferred: tuple[str, ...]) -> str | None:
+    """Перший формат з `preferred`, який приймає клієнт."""
+    accepted = parse_accept_encoding(header)
+    for encoding in preferred:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Стиснення відповідей (zstd, brotli, gzip) за заголовком `Accept-Encoding`.
+
+    Стискаються тільки відповіді з типом вмісту з `media_types`, розміром від
+    `minimum_size` байт і без власного `Content-Encoding`. Потокові відповіді
+    (StreamingResponse) стискаються частинами, по мірі надходження.
+
+    Використання:
+        app.add_middleware(CompressionMiddleware, minimum_size=1024, levels={"gzip": 5})
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = MINIMUM_SIZE,
+        media_types: tuple[str, ...] = COMPRESSIBLE_MEDIA_TYPES,
+        encodings: tuple[str, ...] = ("zstd", "br", "gzip"),
+        levels: dict[str, int] | None = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.media_types = media_types
+        # формати, які не встановлені, пропускаються
+        self.encodings = tuple(
+            encoding for encoding in encodings if encoding in ENCODERS
+        )
+        self.levels = {
+            encoding: (levels or {}).get(encoding, ENCODERS[encoding][1])
+            for encoding in self.encodings
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    """Стиснення однієї відповіді: рішення приймається за першою частиною тіла."""
+
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: str, send: Send
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Message | None = None
+        self._encoder: Encoder | None = None
+        # False - відповідь передається без змін
+        self._compress: bool | None = None
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type.startswith(self.middleware.media_types)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # заголовки відправляються разом з першою частиною тіла
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compress is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            self._compress = self._should_compress(headers) and (
+                more_body or len(body) >= self.middleware.minimum_size
+            )
+            if self._compress:
+                encoder_class, _ = ENCODERS[self.encoding]
+                self._encoder = encoder_class(self.middleware.levels[self.encoding])
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    # розмір стисненого потоку заздалегідь невідомий
+                    del headers["Content-Length"]
+                else:
+                    body = self._encoder.compress(body) + self._encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            elif self._should_compress(headers):
+                # стиснення можливе, але відповідь замала: кеші мають враховувати формат
+                headers.add_vary_header("Accept-Encoding")
+            await self._send(self._start)
+            if not self._compress or not more_body:
+                await self._send(message)
+                return
+
+        if not self._compress:
+            await self._send(message)
+            return
+
+        data = self._encoder.compress(body)
+        if not more_body:
+            data += self._encoder.finish()
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
@@ -0,0 +1,173 @@
+# Копія `common/etag.py`: контекст збірки Docker образу - тільки папка `backend`.
+import hashlib
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# клієнт може зберігати відповідь, але перед використанням має перевірити її
+# через `If-None-Match` (значення для `cache_control` в `ETagMiddleware`)
+NO_CACHE = "no-cache"
+# заголовки, які відповідь 304 повторює з повної відповіді (RFC 9110, 15.4.5)
+NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "etag", "expires", "vary")
+
+
+def make_etag(data: bytes) -> str:
+    """
+    Слабкий ETag з хешу тіла відповіді. Слабкий, тому що одні й ті самі дані
+    можуть бути передані по-різному (наприклад, стиснені або ні).
+    """
+    return f'W/"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def row_etag(*values: Any) -> str:
+    """ETag з версії рядка або значень його полів: без серіалізації відповіді в JSON."""
+    return make_etag(repr(values).encode())
+
+
+def version_etag(version: int) -> str:
+    """ETag з номера версії рядка (`W/"3"`), який змінюється при кожній зміні рядка."""
+    return f'W/"{version}"'
+
+
+def parse_version_etag(etag: str) -> int | None:
+    """Номер версії з ETag, створеного `version_etag`, або `None` для іншого значення."""
+    value = etag.strip().removeprefix("W/")
+    if len(value) > 2 and value[0] == value[-1] == '"' and value[1:-1].isdigit():
+        return int(value[1:-1])
+    return None
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Чи є `etag` в заголовку `If-None-Match` (слабке порівняння, без `W/`)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    Відповідь 304, якщо клієнт вже має актуальну версію даних, інакше `None`.
+    Перевірка виконується до серіалізації відповіді:
+
+        etag = row_etag(user["id"], user["version"])
+        if not_modified_response := not_modified(request, etag):
+            return not_modified_response
+    """
+    if request.method == "GET" and etag_matches(
+        request.headers.get("if-none-match"), etag
+    ):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+class ETagMiddleware:
+    """
+    ETag і умовні GET запити для відповідей 200 на GET.
+
+    Якщо ендпоінт не задав ETag сам, він обчислюється з хешу тіла відповіді
+    (потокові відповіді пропускаються). Якщо ETag є в `If-None-Match` запиту,
+    клієнт отримує 304 без тіла.
+
+    `cache_control` - значення `Cache-Control` для окремих маршрутів (за шаблоном
+    шляху, як в декораторі ендпоінта). Він додається тільки тим маршрутам, які є
+    в `cache_control`, і тільки якщо ендпоінт не задав його сам:
+
+        app.add_middleware(
+            ETagMiddleware,
+            cache_control={
+                "/books/": NO_CACHE,
+                "/books/{book_id}": "private, max-age=30",
+            },
+        )
+
+    HEAD запити не обробляються: для них потрібен окремий маршрут, а тіло відповіді
+    на HEAD порожнє, тому ETag з нього не збігався б з ETag відповіді на GET.
+    """
+
+    def __init__(
+        self, app: ASGIApp, *, cache_control: dict[str, str] | None = None
+    ) -> None:
+        self.app = app
+        self.cache_control = cache_control or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        responder = ETagResponder(self, scope, send)
+        await self.app(scope, receive, responder.send)
+
+
+class ETagResponder:
+    """ETag однієї відповіді: заголовки відправляються разом з першою частиною тіла."""
+
+    def __init__(self, middleware: ETagMiddleware, scope: Scope, send: Send) -> None:
+        self.middleware = middleware
+        self.scope = scope
+        self._send = send
+        self._start: Message | None = None
+        # True - тіло відповіді не відправляється (відповідь 304)
+        self._skip_body = False
+
+    def _route_cache_control(self) -> str | None:
+        # маршрут, який обробив запит, FastAPI зберігає в scope
+        path = getattr(self.scope.get("route"), "path", None)
+        return self.middleware.cache_control.get(path)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._start is None:
+            if not self._skip_body:
+                await self._send(message)
+            return
+
+        start, self._start = self._start, None
+        if start["status"] not in (200, 304):
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        etag = headers.get("etag")
+        if etag is None and start["status"] == 200 and not message.get("more_body"):
+            etag = make_etag(message.get("body", b""))
+            headers["ETag"] = etag
+        cache_control = self._route_cache_control()
+        if etag is not None and cache_control and "cache-control" not in headers:
+            headers["Cache-Control"] = cache_control
+
+        # 304 від ендпоінта (`not_modified`) відправляється як є
+        if (
+            start["status"] == 200
+            and etag is not None
+            and etag_matches(Headers(scope=self.scope).get("if-none-match"), etag)
+        ):
+            self._skip_body = True
+            await self._send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [
+                        (name, value)
+                        for name, value in headers.raw
+                        if name.decode("latin-1") in NOT_MODIFIED_HEADERS
+                    ],
+                }
+            )
+            await self._send({"type": "http.response.body", "body": b""})
+            return
+
+        await self._send(start)
+        await self._send(message)
@@ -0,0 +1,49 @@
+# Копія `common/responses.py`: контекст збірки Docker образу - тільки папка `backend`.
+import json
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pip install orjson
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Значення, які кодувальник JSON не підтримує сам."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    # sqlite3.Row / aiosqlite.Row: рядок БД з назвами колонок
+    if hasattr(value, "keys"):
+        return dict(value)
+    # DECIMAL з MySQL, як і в jsonable_encoder
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON відповідь, яка кодується через orjson (або стандартний `json`, якщо orjson
+    не встановлений).
+
+    Якщо ендпоінт повертає відповідь сам, FastAPI не перевіряє її на відповідність
+    `response_model` і не проходить її через `jsonable_encoder`. Тому для рядків з БД,
+    яким ми довіряємо (схема таблиці вже гарантує типи), не треба створювати модель
+    для кожного рядка, а `response_model` в декораторі залишається тільки для документації:
+
+        @app.get("/books/", response_model=list[BookInfo])
+        async def get_books():
+            ...
+            return FastJSONResponse(db_books)
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return json.dumps(
+                content, default=_default, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+        return orjson.dumps(content, default=_default)
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# модулі бекенду імпортуються так само, як при запуску `uvicorn book_api:app` з його папки
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1]))
@@ -0,0 +1,150 @@
+import functools
+import json
+
+import aiomysql
+import book_api
+import pytest
+from book_api import Book, BookUpdate, insert_books, insert_outcomes, run_bulk
+from bulk import InvalidItem, iter_chunks, validate_chunk
+from fastapi import Request
+from pydantic import TypeAdapter, ValidationError
+
+
+class FakeCursor:
+    """Курсор, який запам'ятовує запити і повертає заздалегідь задані рядки."""
+
+    def __init__(self, results: list[list[tuple]]) -> None:
+        self.results = results
+        self.executed = []
+
+    async def execute(self, query: str, args=None) -> None:
+        self.executed.append((query, args))
+
+    async def executemany(self, query: str, args) -> None:
+        self.executed.append((query, args))
+
+    async def fetchall(self) -> list[tuple]:
+        return self.results.pop(0)
+
+    async def __aenter__(self) -> "FakeCursor":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        pass
+
+
+class FakeConnection:
+    def __init__(self, results: list[list[tuple]] | None = None) -> None:
+        self.fake_cursor = FakeCursor(results or [])
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self) -> FakeCursor:
+        return self.fake_cursor
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+    async def ensure_closed(self) -> None:
+        pass
+
+
+def json_request(items: list) -> Request:
+    """Запит з JSON масивом в тілі, як його отримує ендпоінт."""
+    body = json.dumps(items).encode()
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    return Request(scope, receive)
+
+
+def book(title: str) -> dict:
+    return {"title": title, "author": "Author", "year": 2000}
+
+
+def test_title_longer_than_column_is_invalid_item() -> None:
+    items = [book("A" * 50), book("B" * 51)]
+
+    chunk = validate_chunk(TypeAdapter(list[Book]), TypeAdapter(Book), items)
+
+    assert chunk[0] == Book(**items[0])
+    assert chunk[1] == InvalidItem("title: String should have at most 50 characters")
+
+
+def test_update_fields_longer_than_column_are_rejected() -> None:
+    with pytest.raises(ValidationError):
+        BookUpdate(author="A" * 51)
+    assert BookUpdate(title="T").author is None
+
+
+def test_insert_outcomes() -> None:
+    # 1 - вже в БД, 3 - повтор назви книги 0, 4 - повтор назви книги 1
+    outcomes = insert_outcomes(5, existing={1}, ids={0: 10, 1: 5, 2: 11})
+
+    error = InvalidItem("Book is already exists.")
+    assert outcomes == [10, error, 11, error, error]
+
+
+@pytest.mark.asyncio
+async def test_insert_books_maps_rows_returned_by_db() -> None:
+    books = [Book(**book(title)) for title in ("Cafe", "Dune", "Café", "Emma")]
+    # БД вважає "Café" тією ж назвою, що й "Cafe" (collation без діакритики),
+    # а "Dune" вже є в таблиці
+    connection = FakeConnection([[(1, 7)], [(0, 20), (1, 7), (3, 21)]])
+
+    outcomes = await insert_books(connection, books)
+
+    error = InvalidItem("Book is already exists.")
+    assert outcomes == [20, error, error, 21]
+    select, insert, _ = connection.fake_cursor.executed
+    assert select[0].endswith("FOR UPDATE;")
+    assert [row[0] for row in insert[1]] == ["Cafe", "Café", "Emma"]
+    assert connection.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_insert_books_without_new_titles_does_not_insert() -> None:
+    books = [Book(**book("Dune"))]
+    connection = FakeConnection([[(0, 7)]])
+
+    outcomes = await insert_books(connection, books)
+
+    assert outcomes == [InvalidItem("Book is already exists.")]
+    assert len(connection.fake_cursor.executed) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_data_error_fails_only_its_chunk(monkeypatch) -> None:
+    connection = FakeConnection()
+
+    async def get_connection() -> FakeConnection:
+        return connection
+
+    async def write_chunk(_, books: list[Book]) -> list[int]:
+        if books[0].year > 2**31:
+            raise aiomysql.DataError(1264, "Out of range value for column 'year'")
+        return [len(book.title) for book in books]
+
+    monkeypatch.setattr(book_api, "get_mysql_connection", get_connection)
+    monkeypatch.setattr(book_api, "iter_chunks", functools.partial(iter_chunks, size=2))
+    items = [{**book("A"), "year": 2**32}, book("BB"), book("CCC"), book("D" * 51)]
+
+    result = await run_bulk(json_request(items), Book, write_chunk)
+
+    assert result.ids == [None, None, 3, None]
+    assert result.succeeded == 1
+    assert (
+        result.errors[0] == "Chunk is not saved: Out of range value for column 'year'"
+    )
+    assert result.errors[1] == result.errors[0]
+    assert result.errors[3].startswith("title:")
+    assert connection.rollbacks == 1
@@ -0,0 +1,74 @@
+import httpx
+import pytest
+from etag import NO_CACHE, ETagMiddleware
+from fastapi import FastAPI, Response
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        ETagMiddleware,
+        cache_control={"/books/": NO_CACHE, "/books/{book_id}": "private, max-age=30"},
+    )
+
+    @app.get("/books/")
+    async def get_books() -> list[str]:
+        return ["Dune", "Emma"]
+
+    @app.get("/books/{book_id}")
+    async def get_book(book_id: int, response: Response) -> dict:
+        response.headers["Cache-Control"] = "no-store"
+        return {"id": book_id}
+
+    @app.get("/stats")
+    async def get_stats() -> dict:
+        return {"books": 2}
+
+    return app
+
+
+async def get(
+    app: FastAPI, path: str, method: str = "GET", **headers
+) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, path, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_cache_control_only_for_listed_routes(app: FastAPI) -> None:
+    books = await get(app, "/books/")
+    stats = await get(app, "/stats")
+
+    assert books.headers["Cache-Control"] == NO_CACHE
+    assert "ETag" in books.headers
+    assert "Cache-Control" not in stats.headers
+    assert "ETag" in stats.headers
+
+
+@pytest.mark.asyncio
+async def test_endpoint_cache_control_is_kept(app: FastAPI) -> None:
+    response = await get(app, "/books/1")
+
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_returns_not_modified(app: FastAPI) -> None:
+    etag = (await get(app, "/books/")).headers["ETag"]
+
+    response = await get(app, "/books/", **{"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == NO_CACHE
+
+
+@pytest.mark.asyncio
+async def test_head_request_is_passed_through(app: FastAPI) -> None:
+    response = await get(app, "/books/", method="HEAD")
+
+    assert response.status_code == 405
+    assert "ETag" not in response.headers
@@ -5,23 +5,20 @@ from fastapi import Depends, FastAPI, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, Field, SecretStr
 
+from FastAPI.common.sqlite_pool import SQLitePool, create_unique_index
+
 SQLITE_DB_NAME = "mydb.db"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-async def get_db():
-    """Створення там повернення з'єднання з БД."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
-        connection.row_factory = aiosqlite.Row
-        yield connection
-
-        await connection.close()
+# довгоживучі з'єднання з БД, які відкриваються при старті сервера
+pool = SQLitePool(SQLITE_DB_NAME)
 
 
 async def create_tables() -> None:
-    """Створення таблиць в БД при старті програми та автоматичне закриття з'єднання після завершення."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
+    """Створення таблиць в БД при старті програми через з'єднання пулу для запису."""
+    async with pool.writer() as connection:
         cursor: aiosqlite.Cursor = await connection.cursor()
         await cursor.execute(
             """
@@ -34,11 +31,18 @@ async def create_tables() -> None:
                 );
             """
         )
+        # email унікальний, тому реєстрація - один INSERT без попередньої перевірки
+        # якщо в існуючій БД вже є дублікати email, сервер не стартує з поясненням
+        await create_unique_index(connection, "ux_users_email", "users", "email")
         await connection.commit()
-        await connection.close()
 
 
-app = FastAPI(on_startup=(create_tables,), docs_url="/docs", redoc_url="/redoc")
+app = FastAPI(
+    on_startup=(pool.open, create_tables),
+    on_shutdown=(pool.close,),
+    docs_url="/docs",
+    redoc_url="/redoc",
+)
 
 
 class UserCreate(BaseModel):
@@ -104,7 +108,7 @@ async def decode_token(token: str):
 )
 async def get_user_me(
     token: str = Depends(oauth2_scheme),
-    connection: aiosqlite.Connection = Depends(get_db),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> UserShow:
     """Отримання даних про поточного автентифікованого користувача."""
     decoded_email = await decode_token(token)
@@ -148,7 +152,7 @@ async def get_user_me(
 )
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    connection: aiosqlite.Connection = Depends(get_db),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> Token:
     """
     Отримання токену автентифікації для доступу до захищених ендпоінтів.
@@ -193,29 +197,26 @@ async def login(
     name="register_user",
 )
 async def user_registration(
-    user_data: UserCreate, connection: aiosqlite.Connection = Depends(get_db)
+    user_data: UserCreate,
+    connection: aiosqlite.Connection = Depends(pool.write_connection),
 ) -> UserShow:
     """Реєстрацію користувача в базі даних."""
-    async with connection.cursor() as cursor:
-        await cursor.execute("SELECT 1 FROM users WHERE email = ?;", (user_data.email,))
-        db_user = await cursor.fetchone()
-
-        if db_user is not None:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "User exists.")
-
-        await cursor.execute(
-            "INSERT INTO users (name, email, password, is_active) VALUES (?, ?, ?, ?) RETURNING id;",
-            (
-                user_data.name,
-                user_data.email,
-                # необхідно явно записати в БД пароль, а не *****
-                user_data.password.get_secret_value(),
-                True,
-            ),
-        )
-
-        last_inserted = await cursor.fetchone()
-        await connection.commit()
+    # якщо користувач з таким email вже є, запис не додається і RETURNING нічого не повертає
+    rows = await connection.execute_fetchall(
+        "INSERT INTO users (name, email, password, is_active) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (email) DO NOTHING RETURNING id;",
+        (
+            user_data.name,
+            user_data.email,
+            # необхідно явно записати в БД пароль, а не *****
+            user_data.password.get_secret_value(),
+            True,
+        ),
+    )
+    await connection.commit()
+    if not rows:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "User exists.")
+    last_inserted = rows[0]
 
     return UserShow(
         **user_data.model_dump(exclude={"is_active"}),
@@ -240,7 +241,7 @@ async def get_users(
     limit: int = Query(
         default=10, description="Maximum number of returned users", gt=0
     ),
-    connection: aiosqlite.Connection = Depends(get_db),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> list[UserShow]:
     """Отримання всіх користувачів з БД враховуючи ліміт."""
     async with connection.cursor() as cursor:
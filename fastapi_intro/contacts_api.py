@@ -1,14 +1,15 @@
 import sqlite3
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, EmailStr
 
-app = FastAPI(title="Contact Book API")
+from FastAPI.common.db_executor import DBExecutor
 
 DB_NAME = "contact.db"
-connection = sqlite3.connect(DB_NAME)
-cursor = connection.cursor()
-cursor.execute(
+
+# таблиця створюється при старті сервера, а не при імпорті модуля
+CONTACT_SCHEMA = (
     """
     CREATE TABLE IF NOT EXISTS contact (
         id INTEGER PRIMARY KEY,
@@ -16,9 +17,48 @@ cursor.execute(
         phone VARCHAR(50),
         email VARCHAR(50)
     )
-    """
+    """,
+    # дублікат email відхиляє сам INSERT (ON CONFLICT) через пошук в індексі
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_contact_email ON contact (email)",
 )
-connection.commit()
+# контакти з однаковим email, які не дають створити унікальний індекс в існуючій БД
+DUPLICATE_EMAILS = (
+    "SELECT email, COUNT(*) FROM contact GROUP BY email HAVING COUNT(*) > 1 LIMIT 5"
+)
+
+db = DBExecutor(DB_NAME)
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    """Створення таблиці контактів та її індексів, якщо їх ще немає."""
+    with conn:
+        table, index = CONTACT_SCHEMA
+        conn.execute(table)
+        duplicates = conn.execute(DUPLICATE_EMAILS).fetchall()
+        if duplicates:
+            found = ", ".join(
+                f"{email!r} ({count} times)" for email, count in duplicates
+            )
+            raise RuntimeError(
+                "Cannot create unique index ux_contact_email: table contact has "
+                f"duplicate email values: {found}. Remove or rename the duplicates "
+                "and restart."
+            )
+        conn.execute(index)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Запуск потоків БД і створення схеми при старті сервера, зупинка - після завершення."""
+    db.start()
+    try:
+        await db.run(create_schema)
+        yield
+    finally:
+        db.shutdown()
+
+
+app = FastAPI(title="Contact Book API", lifespan=lifespan)
 
 
 class Contact(BaseModel):
@@ -39,38 +79,41 @@ def read_root():
     return {"message": "Welcome to Contact Book API"}
 
 
-@app.get("/contacts/")
-def get_contacts() -> list[Contact]:
-    with sqlite3.Connection(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM contact")
-        rows = cursor.fetchall()
-
-    return [Contact(id=row[0], name=row[1], phone=row[2], email=row[3]) for row in rows]
+def select_contacts(conn: sqlite3.Connection) -> list[tuple]:
+    """Всі контакти."""
+    return conn.execute("SELECT * FROM contact").fetchall()
 
 
-@app.post("/contacts/")
-def add_contact(contact: ContactCreate) -> Contact:
-    with sqlite3.Connection(DB_NAME) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM contact WHERE email = ?", (contact.email,))
-        row = cursor.fetchone()
-
-        if row is not None:
-            raise HTTPException(
-                status_code=400, detail="Contact with this email already exists."
-            )
-
-        cursor = cursor.execute(
-            "INSERT INTO contact (name, phone, email) VALUES (?, ?, ?) RETURNING id",
+def insert_contact(conn: sqlite3.Connection, contact: ContactCreate) -> int | None:
+    """Додавання контакту, повертає його ID або `None`, якщо email вже зайнятий."""
+    with conn:
+        # якщо email вже зайнятий, запис не додається і RETURNING нічого не повертає
+        row = conn.execute(
+            "INSERT INTO contact (name, phone, email) VALUES (?, ?, ?) "
+            "ON CONFLICT (email) DO NOTHING RETURNING id",
             (
                 contact.name,
                 contact.phone,
                 contact.email,
             ),
+        ).fetchone()
+    return None if row is None else row[0]
+
+
+@app.get("/contacts/")
+async def get_contacts() -> list[Contact]:
+    rows = await db.run(select_contacts)
+
+    return [Contact(id=row[0], name=row[1], phone=row[2], email=row[3]) for row in rows]
+
+
+@app.post("/contacts/")
+async def add_contact(contact: ContactCreate) -> Contact:
+    contact_id = await db.run(insert_contact, contact)
+    if contact_id is None:
+        raise HTTPException(
+            status_code=400, detail="Contact with this email already exists."
         )
-        contact_id = cursor.fetchone()[0]
-        conn.commit()
 
     return Contact(
         id=contact_id,
@@ -1,10 +1,21 @@
 import sqlite3
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query
 from pydantic import BaseModel
 
+from FastAPI.common.content_encoding import CompressionMiddleware
+from FastAPI.common.db_executor import DBExecutor
+from FastAPI.common.etag import NO_CACHE, ETagMiddleware
+from FastAPI.common.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_after_id
+from FastAPI.common.responses import FastJSONResponse
+
 DB_NAME = "my_db.db"
+USER_FIELDS = ("id", "first_name", "last_name", "email")
+
+# запити до БД виконуються в окремих потоках з постійними з'єднаннями,
+# а не в загальному пулі потоків Starlette
+db = DBExecutor(DB_NAME)
 
 
 class BaseUser(BaseModel):
@@ -29,130 +40,153 @@ class UserInfo(BaseUser):
     id: int
 
 
+def create_table(conn: sqlite3.Connection) -> None:
+    """Створення таблиці користувачів, якщо її ще немає."""
+    with conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user (
+                id INTEGER PRIMARY KEY,
+                first_name VARCHAR(50),
+                last_name VARCHAR(50),
+                email VARCHAR(50)
+            );
+            """
+        )
+
+
 @asynccontextmanager
 async def create_tables(_: FastAPI):
-    """Створення таблиць в БД при старті програми."""
+    """Створення таблиць в БД при старті програми та зупинка потоків БД після завершення."""
+    db.start()
     try:
-        with sqlite3.connect(DB_NAME, check_same_thread=True) as connection:
-            cursor = connection.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS user (
-                    id INTEGER PRIMARY KEY,
-                    first_name VARCHAR(50),
-                    last_name VARCHAR(50),
-                    email VARCHAR(50)
-                );
-                """
-            )
-            connection.commit()
-    except sqlite3.Error as e:
-        raise e
-
-    yield
+        await db.run(create_table)
+        yield
+    finally:
+        db.shutdown()
 
 
 app = FastAPI(lifespan=create_tables)
+app.add_middleware(
+    ETagMiddleware, cache_control={"/users/": NO_CACHE, "/users/{user_id}": NO_CACHE}
+)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
 
-@app.post("/users/", status_code=201, response_model=UserInfo, tags=["users"])
-def create_user(user: CreateUser) -> UserInfo:
-    """Створення користувача."""
-    with sqlite3.connect(DB_NAME, check_same_thread=True) as conn:
-        cur = conn.cursor()
-        cur.execute(
+def insert_user(conn: sqlite3.Connection, user: CreateUser) -> tuple:
+    """Додавання користувача, повертає створений запис."""
+    with conn:
+        return conn.execute(
             "INSERT INTO user (first_name, last_name, email) VALUES (?, ?, ?) RETURNING *;",
             (*user.model_dump().values(),),
+        ).fetchone()
+
+
+def select_user(conn: sqlite3.Connection, user_id: int) -> tuple | None:
+    """Запис користувача по ID."""
+    return conn.execute(
+        "SELECT id, first_name, last_name, email FROM user WHERE id = ?;",
+        (user_id,),
+    ).fetchone()
+
+
+def select_users(
+    conn: sqlite3.Connection, skip: int, limit: int, after_id: int | None
+) -> list[tuple]:
+    """Сторінка користувачів за `OFFSET` або за ключем (ID)."""
+    if after_id is not None:
+        cur = conn.execute(
+            "SELECT id, first_name, last_name, email FROM user "
+            "WHERE id > :after_id ORDER BY id LIMIT :limit;",
+            {"after_id": after_id, "limit": limit},
+        )
+    else:
+        cur = conn.execute(
+            "SELECT id, first_name, last_name, email FROM user LIMIT :limit OFFSET :skip;",
+            {"limit": limit, "skip": skip},
         )
-        rows = cur.fetchone()
-        conn.commit()
+    return cur.fetchall()
 
-    user_fields = ("id", "first_name", "last_name", "email")
-    return UserInfo(**dict(zip(user_fields, rows)))
+
+def update_user_row(
+    conn: sqlite3.Connection, user_id: int, data_to_update: BaseUser
+) -> tuple | None:
+    """Оновлення користувача по ID, повертає оновлений запис або `None`, якщо користувача не існує."""
+    with conn:
+        return conn.execute(
+            "UPDATE user SET first_name = ?, last_name = ?, email = ? WHERE id = ? RETURNING *;",
+            (*data_to_update.model_dump().values(), user_id),
+        ).fetchone()
+
+
+def delete_user_row(conn: sqlite3.Connection, user_id: int) -> bool:
+    """Видалення користувача по ID, повертає `False`, якщо користувача не існує."""
+    with conn:
+        cur = conn.execute("DELETE FROM user WHERE id = ?", (user_id,))
+    return cur.rowcount > 0
+
+
+@app.post("/users/", status_code=201, response_model=UserInfo, tags=["users"])
+async def create_user(user: CreateUser) -> UserInfo:
+    """Створення користувача."""
+    rows = await db.run(insert_user, user)
+    return UserInfo(**dict(zip(USER_FIELDS, rows)))
 
 
 @app.get("/users/{user_id}", status_code=200, response_model=UserInfo, tags=["users"])
-def get_user(user_id: int) -> UserInfo:
+async def get_user(user_id: int) -> UserInfo:
     """Отримання користувача по ID."""
-    with sqlite3.connect(DB_NAME, check_same_thread=True) as conn:
-        cur = conn.cursor()
-        # перевіряємо, чи користувач існує
-        cur.execute(
-            "SELECT id, first_name, last_name, email FROM user WHERE id = ?;",
-            (user_id,),
-        )
-    raw = cur.fetchone()
+    raw = await db.run(select_user, user_id)
     if raw is None:
         raise HTTPException(status_code=404, detail="User not found.")
 
-    user_fields = ("id", "first_name", "last_name", "email")
-    user_info = dict(zip(user_fields, raw))
+    user_info = dict(zip(USER_FIELDS, raw))
     user = UserInfo(**user_info)
     return user
 
 
 @app.get("/users/", status_code=200, response_model=list[UserInfo], tags=["users"])
-def get_users(
-    skip: int = Query(default=0), limit: int = Query(default=100)
-) -> list[UserInfo]:
-    """Отримання користувачів."""
-    with sqlite3.connect(DB_NAME, check_same_thread=True) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, first_name, last_name, email FROM user LIMIT :limit OFFSET :skip;",
-            (limit, skip),
-        )
-    rows = cur.fetchall()
-    user_fields = ("id", "first_name", "last_name", "email")
-    users = [UserInfo(**dict(zip(user_fields, row))) for row in rows]
-    return users
+async def get_users(
+    skip: int = Query(default=0),
+    limit: int = Query(default=100),
+    after_id: int | None = Depends(keyset_after_id),
+) -> FastJSONResponse:
+    """
+    Отримання користувачів.
+    З `after_id` або `cursor` сторінки вибираються за ключем (ID) замість `OFFSET`,
+    а курсор наступної сторінки повертається в заголовку `X-Next-Cursor`.
+    """
+    rows = await db.run(select_users, skip, limit, after_id)
+    # рядки таблиці user вже мають типи UserInfo, тому модель для кожного не створюється
+    users = [dict(zip(USER_FIELDS, row)) for row in rows]
+
+    headers = {}
+    if after_id is not None and users and len(users) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(users[-1]["id"])
+    return FastJSONResponse(users, headers=headers)
 
 
 @app.put("/users/{user_id}", status_code=200, response_model=UserInfo, tags=["users"])
-def update_user(user_id: int, data_to_update: BaseUser) -> UserInfo:
+async def update_user(user_id: int, data_to_update: BaseUser) -> UserInfo:
     """Оновлення користувача по ID."""
-    with sqlite3.connect(DB_NAME, check_same_thread=True) as conn:
-        cursor = conn.cursor()
-        # перевіряємо, чи користувач існує
-        cursor.execute(
-            "SELECT 1 FROM user WHERE id = ?",
-            (user_id,),
-        )
-        raw = cursor.fetchone()
-        if raw is None:
-            raise HTTPException(status_code=404, detail="User not found.")
-
-        # оновлюємо дані користувача передані в тілі запиту
-        cursor = cursor.execute(
-            "UPDATE user SET first_name = ?, last_name = ?, email = ? WHERE id = ? RETURNING *;",
-            (*data_to_update.model_dump().values(), user_id),
-        )
-        raw = cursor.fetchone()
-        conn.commit()
+    # оновлюємо дані користувача передані в тілі запиту
+    raw = await db.run(update_user_row, user_id, data_to_update)
+    if raw is None:
+        raise HTTPException(status_code=404, detail="User not found.")
 
-    user_fields = ("id", "first_name", "last_name", "email")
-    user_info = dict(zip(user_fields, raw))
+    user_info = dict(zip(USER_FIELDS, raw))
     user = UserInfo(**user_info)
     return user
 
 
 @app.delete("/users/{user_id}", status_code=204, tags=["users"])
-def delete_user(user_id: int) -> None:
+async def delete_user(user_id: int) -> None:
     """Видалення користувача по ID."""
-    with sqlite3.connect(DB_NAME, check_same_thread=True) as conn:
-        cur = conn.cursor()
-        # перевіряємо, чи користувач існує
-        cur.execute(
-            "SELECT 1 FROM user WHERE id = ?",
-            (user_id,),
-        )
-        raw = cur.fetchone()
-        if raw is None:
-            raise HTTPException(status_code=404, detail="User not found.")
-
-        # видаляємо користувача
-        cur = cur.execute(
-            "DELETE FROM user WHERE id = ?",
-            (user_id,),
-        )
-        conn.commit()
+    if not await db.run(delete_user_row, user_id):
+        raise HTTPException(status_code=404, detail="User not found.")
+
+
+@app.get("/stats/db", tags=["service"])
+async def get_db_stats() -> dict[str, int | float]:
+    """Лічильники черги запитів до БД: час очікування на вільний потік в секундах."""
+    return db.stats.snapshot()
@@ -1,4 +1,6 @@
+import asyncio
 import pathlib
+import time
 from io import BytesIO
 
 import httpx
@@ -36,6 +38,61 @@ async def resize_image(img: bytes, fmt: str, size: tuple[int, int]) -> None:
     print(f"Image saved to: {save_path}")
 
 
+# максимальна кількість зображень, які обробляються одночасно в межах одного запиту
+MAX_CONCURRENT_UPLOADS = 4
+THUMBNAIL_SIZE = (128, 128)
+
+
+def write_file(path: pathlib.Path, content: bytes) -> None:
+    """Блокуючий запис вмісту файлу на диск (викликається в окремому потоці)."""
+    with open(path, mode="wb") as fp:
+        fp.write(content)
+
+
+def create_thumbnails(paths: list[pathlib.Path], size: tuple[int, int]) -> None:
+    """
+    Створення мініатюр для всіх збережених зображень однією фоновою задачею.
+    Файл, який не вдалось обробити, пропускається, щоб не зупиняти обробку решти.
+    """
+    for path in paths:
+        thumbnail_path = path.with_name(f"thumbnail_{path.name}")
+        try:
+            with Image.open(path) as image:
+                image.thumbnail(size)
+                image.save(thumbnail_path)
+        except (OSError, ValueError) as e:
+            # UnidentifiedImageError (не зображення) - теж OSError
+            print(f"Thumbnail for {path.name} is not created: {e}")
+            continue
+        print(f"Thumbnail saved to: {thumbnail_path}")
+
+
+def safe_filename(image: UploadFile) -> str:
+    """Тільки ім'я файлу, щоб не дати записати файл за межі папки модуля."""
+    return pathlib.Path(str(image.filename)).name
+
+
+async def save_image(
+    image: UploadFile, filename: str, semaphore: asyncio.Semaphore
+) -> dict[str, str | int | float]:
+    """
+    Збереження одного зображення на диск під ім'ям `filename` з обмеженням
+    кількості одночасних операцій. Повертає розмір файлу та час його обробки.
+    """
+    async with semaphore:
+        start = time.perf_counter()
+        content = await image.read()
+        # запис на диск блокуючий, тому виконуємо його в окремому потоці,
+        # щоб не блокувати цикл подій (event loop)
+        await asyncio.to_thread(write_file, module_path / filename, content)
+
+    return {
+        "filename": filename,
+        "size": len(content),
+        "elapsed": round(time.perf_counter() - start, 6),
+    }
+
+
 # curl -X 'POST' \
 # 'http://127.0.0.1:8000/login/' \
 #  -H 'accept: application/json' \
@@ -119,14 +176,20 @@ async def create_upload_file(file: UploadFile | None = None):
 #  -F 'description=For test!' \
 #  -F 'images=@01 (1).jpg;type=image/jpeg' \
 #  -F 'images=@1zgqoa.jpeg;type=image/jpeg' \
-#  -F 'images=@01.jpg;type=image/jpeg'
+#  -F 'images=@01.jpg;type=image/jpeg' \
+#  -F 'thumbnails=true'
 @app.post("/upload_multiple_images/")
 async def upload_multiple_images(
-    images: list[UploadFile], description: str = Form(...)
+    bg_tasks: BackgroundTasks,
+    images: list[UploadFile],
+    description: str = Form(...),
+    thumbnails: bool = Form(False),
 ):
-    """Завантаження більше одного зображення разом з полем опису."""
-    image_filenames = []
-
+    """
+    Завантаження більше одного зображення разом з полем опису.
+    Зображення обробляються одночасно (не більше `MAX_CONCURRENT_UPLOADS` за раз),
+    а при `thumbnails=true` для всіх них створюються мініатюри однією фоновою задачею.
+    """
     # Дані з форм зазвичай кодуються за допомогою media type 'application/x-www-form-urlencoded',
     # коли вони не містять файлів, але коли форма містить файли, вона кодується як 'multipart/form-data'.
     # Якщо використовується 'File', FastAPI знатиме, що йому потрібно отримати файли з правильної частини тіла запиту.
@@ -135,14 +198,38 @@ async def upload_multiple_images(
     # але також не можна визначити поля 'Body', які повинні бути отримані у форматі JSON,
     # оскільки тіло запиту буде закодовано з використанням 'multipart/form-data' замість 'application/json'.
     # Це не є обмеженням FastAPI, це частина протоколу HTTP.
-    for image in images:
-        with open(module_path / str(image.filename), mode="wb") as fp:
-            # await file.read() краще викликати в середині функції з async (корутина)
-            # file.file.read() краще викликати в середині звичайної функції
-            fp.write(await image.read())
-            image_filenames.append(image.filename)
+    start = time.perf_counter()
+    filenames = [safe_filename(image) for image in images]
+    # файли з однаковим ім'ям записувались би одночасно в один і той самий файл
+    duplicates = sorted({name for name in filenames if filenames.count(name) > 1})
+    if duplicates:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Duplicate filenames: {', '.join(duplicates)}.",
+        )
 
-    return {"description": description, "images": image_filenames}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+    results = await asyncio.gather(
+        *(
+            save_image(image, filename, semaphore)
+            for image, filename in zip(images, filenames)
+        )
+    )
+
+    if thumbnails:
+        # одна задача на всі зображення замість окремої задачі для кожного
+        bg_tasks.add_task(
+            create_thumbnails,
+            paths=[module_path / str(result["filename"]) for result in results],
+            size=THUMBNAIL_SIZE,
+        )
+
+    return {
+        "description": description,
+        "images": results,
+        "thumbnails": thumbnails,
+        "elapsed": round(time.perf_counter() - start, 6),
+    }
 
 
 MAX_IMAGE_SIZE = 1024 * 1024 * 10  # 10Mb
@@ -251,5 +338,77 @@ async def test_upload_file_exceeds_size() -> None:
     }
 
 
+@pytest.mark.asyncio
+async def test_upload_multiple_images() -> None:
+    """Тест на одночасне завантаження кількох зображень зі створенням мініатюр."""
+    filenames = [f"test_multiple_upload_{n}.jpg" for n in range(3)]
+    content = (module_path / "test_file_supported_format.jpg").read_bytes()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://127.0.0.1:8000"
+    ) as client:
+        response = await client.post(
+            "/upload_multiple_images/",
+            files=[("images", (name, content, "image/jpeg")) for name in filenames],
+            data={"description": "For test!", "thumbnails": "true"},
+        )
+
+    try:
+        assert response.status_code == status.HTTP_200_OK
+        response_data = response.json()
+        assert response_data["description"] == "For test!"
+        assert [image["filename"] for image in response_data["images"]] == filenames
+        assert all(image["size"] == len(content) for image in response_data["images"])
+        for name in filenames:
+            assert (module_path / name).read_bytes() == content
+            assert (module_path / f"thumbnail_{name}").exists()
+    finally:
+        for name in filenames:
+            (module_path / name).unlink(missing_ok=True)
+            (module_path / f"thumbnail_{name}").unlink(missing_ok=True)
+
+
+@pytest.mark.asyncio
+async def test_upload_multiple_images_duplicate_filenames() -> None:
+    """Тест на відхилення запиту з кількома файлами з однаковим ім'ям."""
+    content = (module_path / "test_file_supported_format.jpg").read_bytes()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://127.0.0.1:8000"
+    ) as client:
+        response = await client.post(
+            "/upload_multiple_images/",
+            files=[
+                ("images", ("test_duplicate.jpg", content, "image/jpeg")),
+                ("images", ("dir/test_duplicate.jpg", content, "image/jpeg")),
+            ],
+            data={"description": "For test!"},
+        )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Duplicate filenames: test_duplicate.jpg."}
+    assert not (module_path / "test_duplicate.jpg").exists()
+
+
+def test_create_thumbnails_skips_broken_image() -> None:
+    """Тест на створення мініатюр, коли одне з зображень не вдається відкрити."""
+    broken = module_path / "test_thumbnail_broken.jpg"
+    valid = module_path / "test_thumbnail_valid.jpg"
+    broken.write_bytes(b"not an image")
+    valid.write_bytes((module_path / "test_file_supported_format.jpg").read_bytes())
+
+    try:
+        create_thumbnails([broken, valid], THUMBNAIL_SIZE)
+
+        assert not (module_path / f"thumbnail_{broken.name}").exists()
+        assert (module_path / f"thumbnail_{valid.name}").exists()
+    finally:
+        for path in (broken, valid):
+            path.unlink(missing_ok=True)
+            (module_path / f"thumbnail_{path.name}").unlink(missing_ok=True)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", port=8000, reload=True)
@@ -0,0 +1,162 @@
+import asyncio
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from parsers import HTML_PARSER, PRODUCTS_XPATH, extract_book, parse_category_page
+
+# збережені сторінки категорій, на яких проводиться вимірювання
+FIXTURES_PATH = pathlib.Path(__file__).parent / "tests" / "fixtures"
+PAGES = [
+    path.read_bytes() for path in sorted(FIXTURES_PATH.glob("**/category/**/*.html"))
+]
+# кількість сторінок для одного запуску (сторінки повторюються по колу)
+NUMBER_OF_PAGES = 300
+
+
+def soup_books(books_section) -> list[tuple[str, str, int, bool]]:
+    """Попередній цикл по книгах: чотири окремі пошуки по дереву на кожну книгу."""
+    books = []
+    for li in books_section.find("ol", class_="row").find_all("li"):
+        title = li.find("h3").find("a").get("title")
+        price = li.select_one("p.price_color").text.strip()
+        in_stock = li.select_one("p.instock.availability").get_text(strip=True)
+        rating_raw = li.find("p", class_="star-rating").get("class")[-1]
+        rating_to_digit = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+        books.append((title, price, rating_to_digit[rating_raw], bool(in_stock)))
+    return books
+
+
+def parse_full_soup(content: bytes) -> list[tuple[str, str, int, bool]]:
+    """Перший варіант: будується дерево всієї сторінки, а не тільки списку книг."""
+    soup = BeautifulSoup(content, "lxml")
+    return soup_books(soup.find(class_="col-sm-8 col-md-9"))
+
+
+def parse_strainer_soup(content: bytes) -> list[tuple[str, str, int, bool]]:
+    """Другий варіант: BeautifulSoup будує тільки список книг (SoupStrainer)."""
+    books_section = BeautifulSoup(
+        content, "lxml", parse_only=SoupStrainer(class_="col-sm-8 col-md-9")
+    )
+    return soup_books(books_section)
+
+
+def measure_sequential(parser, pages: list[bytes]) -> float:
+    """Час послідовного парсингу всіх сторінок в одному процесі."""
+    start = time.perf_counter()
+    for content in pages:
+        parser(content)
+    return time.perf_counter() - start
+
+
+def measure_books_loop(pages: list[bytes]) -> tuple[float, float, int]:
+    """
+    Мікро-бенчмарк найвнутрішнішого циклу: тільки вилучення даних книг з уже
+    побудованих дерев, без часу парсингу HTML.
+    Повертає час попереднього циклу BeautifulSoup, час `extract_book` і кількість книг.
+    """
+    soups = [
+        BeautifulSoup(c, "lxml", parse_only=SoupStrainer(class_="col-sm-8 col-md-9"))
+        for c in pages
+    ]
+    products = [
+        product
+        for c in pages
+        for product in PRODUCTS_XPATH(etree.fromstring(c, HTML_PARSER))
+    ]
+
+    start = time.perf_counter()
+    for soup in soups:
+        soup_books(soup)
+    soup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for product in products:
+        extract_book(product)
+    compiled_time = time.perf_counter() - start
+
+    return soup_time, compiled_time, len(products)
+
+
+async def heartbeat(stop: asyncio.Event) -> float:
+    """
+    Імітує інших клієнтів сервера: "прокидається" кожну 1 мс
+    і повертає найбільшу затримку між пробудженнями (наскільки був заблокований цикл подій).
+    """
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+    return max_lag
+
+
+async def measure_event_loop(
+    pages: list[bytes], pool: ProcessPoolExecutor | None
+) -> tuple[float, float]:
+    """Повертає загальний час парсингу і максимальну затримку циклу подій."""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    heartbeat_task = asyncio.create_task(heartbeat(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    if pool is None:
+        # парсинг прямо в циклі подій, як це було в ендпоінті
+        for content in pages:
+            parse_full_soup(content)
+            await asyncio.sleep(0)
+    else:
+        await asyncio.gather(
+            *(loop.run_in_executor(pool, parse_category_page, c) for c in pages)
+        )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    return elapsed, await heartbeat_task
+
+
+async def main() -> None:
+    pages = [PAGES[n % len(PAGES)] for n in range(NUMBER_OF_PAGES)]
+
+    full_time = measure_sequential(parse_full_soup, pages)
+    strainer_time = measure_sequential(parse_strainer_soup, pages)
+    compiled_time = measure_sequential(parse_category_page, pages)
+    print(f"Сторінок: {len(pages)}")
+    print(
+        f"Повне дерево (BeautifulSoup): {full_time / len(pages) * 1000:.3f} мс на сторінку."
+    )
+    print(
+        f"Тільки список книг (SoupStrainer): {strainer_time / len(pages) * 1000:.3f} мс на сторінку."
+    )
+    print(
+        f"lxml і скомпільовані XPath: {compiled_time / len(pages) * 1000:.3f} мс на сторінку."
+    )
+
+    soup_time, compiled_time, number_of_books = measure_books_loop(pages)
+    print(
+        f"Цикл по книгах ({number_of_books} книг): "
+        f"BeautifulSoup {soup_time / number_of_books * 1_000_000:.1f} мкс на книгу, "
+        f"extract_book {compiled_time / number_of_books * 1_000_000:.1f} мкс на книгу."
+    )
+
+    elapsed, lag = await measure_event_loop(pages, None)
+    print(
+        f"В циклі подій: {len(pages) / elapsed:.1f} сторінок/с, "
+        f"максимальна затримка інших запитів {lag * 1000:.1f} мс."
+    )
+
+    with ProcessPoolExecutor() as pool:
+        # прогріваємо процеси, щоб не враховувати час їх запуску
+        await measure_event_loop(pages[:10], pool)
+        elapsed, lag = await measure_event_loop(pages, pool)
+    print(
+        f"В пулі процесів: {len(pages) / elapsed:.1f} сторінок/с, "
+        f"максимальна затримка інших запитів {lag * 1000:.1f} мс."
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
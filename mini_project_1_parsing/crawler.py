@@ -0,0 +1,184 @@
+import asyncio
+from dataclasses import dataclass
+
+import httpx
+from http_cache import HttpCache
+
+# статуси відповіді, при яких запит має сенс повторити
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# найдовша затримка з заголовка `Retry-After`, яку рушій готовий чекати (секунди)
+MAX_RETRY_AFTER = 60.0
+
+
+class CrawlBudgetExceeded(Exception):
+    """Виняток, коли кількість запитів перевищила виділений бюджет."""
+
+
+@dataclass
+class RequestBudget:
+    """Бюджет запитів (разом з повторними) для однієї операції парсингу."""
+
+    limit: int
+    used: int = 0
+
+    def spend(self) -> None:
+        """Списує один запит з бюджету або піднімає `CrawlBudgetExceeded`."""
+        if self.used >= self.limit:
+            raise CrawlBudgetExceeded(
+                f"Request budget of {self.limit} requests is exceeded."
+            )
+        self.used += 1
+
+
+class Crawler:
+    """
+    Рушій для завантаження сторінок через один спільний `httpx.AsyncClient`
+    з пулом з'єднань, обмеженням одночасних запитів на кожен хост
+    та повторними запитами з експоненційною затримкою.
+    Якщо переданий `cache`, свіжі сторінки віддаються без запиту в мережу,
+    а застарілі перевіряються умовним запитом (`If-None-Match`/`If-Modified-Since`).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 20,
+        per_host_limit: int = 5,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_retry_after: float = MAX_RETRY_AFTER,
+        timeout: float = 10.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: HttpCache | None = None,
+    ) -> None:
+        self.cache = cache
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_after = max_retry_after
+        # з'єднання з хостом перевикористовуються між запитами (keep-alive),
+        # а їх загальна кількість обмежена пулом
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "Crawler":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Закриває всі з'єднання пулу."""
+        await self.client.aclose()
+
+    def _host_semaphore(self, url: httpx.URL) -> asyncio.Semaphore:
+        """Повертає семафор для хоста, створюючи його при першому запиті."""
+        if url.host not in self._host_semaphores:
+            self._host_semaphores[url.host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[url.host]
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        """Затримка перед повторним запитом з урахуванням заголовка `Retry-After`."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                # сервер може попросити чекати години: запит не має висіти так довго
+                return min(float(retry_after), self.max_retry_after)
+        return self.backoff_factor * 2**attempt
+
+    async def fetch(
+        self,
+        url: str,
+        *,
+        budget: RequestBudget | None = None,
+        follow_redirects: bool = False,
+    ) -> httpx.Response:
+        """
+        Отримує сторінку за адресою `url` з кешу або з мережі.
+        Мережеві помилки і статуси з `RETRY_STATUSES` повторюються до `max_retries` разів,
+        після чого повертається остання відповідь або піднімається остання помилка.
+        """
+        if self.cache is None:
+            return await self._request(url, {}, budget, follow_redirects)
+
+        entry = await self.cache.get(url)
+        if entry is not None and entry.is_fresh:
+            self.cache.stats.hits += 1
+            return entry.to_response()
+
+        headers = entry.validators() if entry is not None else {}
+        response = await self._request(url, headers, budget, follow_redirects)
+
+        if entry is not None and response.status_code == 304:
+            # сторінка не змінилась: тіло не завантажувалось, береться з кешу
+            self.cache.stats.revalidated += 1
+            await self.cache.refresh(url, response)
+            return entry.to_response()
+
+        self.cache.stats.misses += 1
+        await self.cache.store(url, response)
+        return response
+
+    async def _request(
+        self,
+        url: str,
+        headers: dict[str, str],
+        budget: RequestBudget | None,
+        follow_redirects: bool,
+    ) -> httpx.Response:
+        """Запит в мережу з обмеженням для хоста, бюджетом і повторними спробами."""
+        request_url = httpx.URL(url)
+        semaphore = self._host_semaphore(request_url)
+
+        attempt = 0
+        while True:
+            if budget is not None:
+                budget.spend()
+
+            response = None
+            async with semaphore:
+                try:
+                    response = await self.client.get(
+                        request_url, headers=headers, follow_redirects=follow_redirects
+                    )
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                else:
+                    if (
+                        response.status_code not in RETRY_STATUSES
+                        or attempt == self.max_retries
+                    ):
+                        return response
+
+            # чекаємо поза семафором, щоб не займати слот хоста під час затримки
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def fetch_all(
+        self,
+        urls: list[str],
+        *,
+        budget: RequestBudget | None = None,
+    ) -> list[httpx.Response]:
+        """
+        Отримує сторінки за списком адрес, зберігаючи порядок відповідей.
+        При першій помилці (наприклад, `CrawlBudgetExceeded`) решта запитів скасовується.
+        """
+        tasks = [asyncio.create_task(self.fetch(url, budget=budget)) for url in urls]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # gather не скасовує інші задачі при помилці однієї з них, і вони
+            # продовжували б запити до сайту вже після відповіді з помилкою
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
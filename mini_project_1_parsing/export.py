@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import csv
+import io
+import os
+import pathlib
+from collections.abc import AsyncIterable, AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+
+from crawler import Crawler, RequestBudget
+from parsers import BookRow
+from pipeline import iter_category_pages
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet і Arrow необов'язкові, CSV працює без pyarrow
+    pa = None
+    pq = None
+
+ExportFormat = Literal["csv", "parquet", "arrow"]
+
+# тип вмісту і розширення файлу для кожного формату експорту
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXPORT_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "arrow": "arrows"}
+
+# (категорія, назва, ціна, валюта, рейтинг, наявність); ціни, яку не вдалось
+# розібрати, немає (порожнє значення в CSV, null в Parquet і Arrow)
+ExportRow = tuple[str, str, float | None, str | None, int, bool]
+EXPORT_COLUMNS = ("category", "title", "price", "currency", "rating", "in_stock")
+
+# скільки книг записується за один раз (одна група рядків у Parquet)
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormatUnavailable(Exception):
+    """Формат експорту потребує необов'язкової залежності, яка не встановлена."""
+
+
+def parse_price(price: str | None) -> tuple[float | None, str | None]:
+    """
+    Розділяє ціну на число і символ валюти: "£45.17" -> (45.17, "£").
+    Ціна, якої немає на сторінці або в якій немає числа, - `(None, None)`,
+    щоб одна така книга не зупиняла весь експорт.
+    """
+    if price is None:
+        return None, None
+    currency = price.rstrip("0123456789.")
+    try:
+        return float(price[len(currency) :]), currency.strip()
+    except ValueError:
+        return None, None
+
+
+def to_export_row(category: str, book: BookRow) -> ExportRow:
+    title, price, rating, in_stock = book
+    amount, currency = parse_price(price)
+    return category, title, amount, currency, rating, in_stock
+
+
+class ChunkSink(io.RawIOBase):
+    """Файл в пам'яті, з якого записані байти забираються частинами після кожної партії."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Повертає байти, записані з попереднього виклику, і звільняє їх."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class CsvExportWriter:
+    """Записує книги у CSV: заголовок з назвами колонок і по рядку на книгу."""
+
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def write_batch(self, rows: list[ExportRow]) -> bytes:
+        self._writer.writerows(rows)
+        return self._drain()
+
+    def close(self) -> bytes:
+        return self._drain()
+
+
+class ArrowExportWriter:
+    """
+    Записує книги у Parquet (кожна партія - окрема група рядків)
+    або у потоковий формат Arrow IPC.
+    """
+
+    def __init__(self, export_format: ExportFormat) -> None:
+        self.schema = pa.schema(
+            [
+                ("category", pa.string()),
+                ("title", pa.string()),
+                ("price", pa.float64()),
+                ("currency", pa.string()),
+                ("rating", pa.int8()),
+                ("in_stock", pa.bool_()),
+            ]
+        )
+        self._sink = ChunkSink()
+        if export_format == "parquet":
+            self._writer = pq.ParquetWriter(self._sink, self.schema)
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def write_batch(self, rows: list[ExportRow]) -> bytes:
+        columns = list(zip(*rows))
+        self._writer.write_batch(pa.record_batch(columns, schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        # Parquet дописує в кінці файлу метадані (footer), Arrow - маркер кінця потоку
+        self._writer.close()
+        return self._sink.drain()
+
+
+def create_writer(export_format: ExportFormat) -> CsvExportWriter | ArrowExportWriter:
+    """Повертає записувач для формату або помилку, якщо для нього не встановлений pyarrow."""
+    if export_format == "csv":
+        return CsvExportWriter()
+    if pa is None:
+        raise ExportFormatUnavailable(
+            f"Export to {export_format} requires pyarrow (pip install pyarrow)."
+        )
+    return ArrowExportWriter(export_format)
+
+
+async def export_books(
+    pages: AsyncIterator[tuple[str, list[BookRow]]],
+    writer: CsvExportWriter | ArrowExportWriter,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Збирає книги з розпарсених сторінок у партії по `batch_size` і повертає
+    байти файлу частинами, тому в пам'яті не тримається весь каталог.
+    """
+    batch: list[ExportRow] = []
+    async for book_category, books in pages:
+        batch.extend(to_export_row(book_category, book) for book in books)
+        if len(batch) >= batch_size:
+            yield writer.write_batch(batch)
+            batch = []
+
+    if batch:
+        yield writer.write_batch(batch)
+    yield writer.close()
+
+
+async def write_file_atomically(chunks: AsyncIterable[bytes], output: str) -> None:
+    """
+    Записує частини файлу у тимчасовий файл поруч з `output` і перейменовує його
+    тільки після запису всіх частин. При помилці тимчасовий файл видаляється,
+    тому обрізаний файл не залишається під назвою `output`.
+    """
+    temporary = f"{output}.part"
+    # відкриття і запис файлу блокуючі, тому виконуються в окремому потоці
+    file = await asyncio.to_thread(open, temporary, "wb")
+    try:
+        with file:
+            async for chunk in chunks:
+                await asyncio.to_thread(file.write, chunk)
+        await asyncio.to_thread(os.replace, temporary, output)
+    except BaseException:
+        await asyncio.to_thread(pathlib.Path(temporary).unlink, missing_ok=True)
+        raise
+
+
+async def export_to_file(
+    urls: list[str],
+    output: str,
+    export_format: ExportFormat,
+    *,
+    max_requests: int,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> None:
+    """Завантажує і парсить категорії за адресами перших сторінок та записує книги у файл."""
+    writer = create_writer(export_format)
+    with ProcessPoolExecutor() as pool:
+        async with Crawler() as crawler:
+            pages = iter_category_pages(
+                crawler, pool, urls, RequestBudget(max_requests)
+            )
+            await write_file_atomically(export_books(pages, writer, batch_size), output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Експорт книг з категорій books.toscrape.com у CSV, Parquet або Arrow."
+    )
+    parser.add_argument("urls", nargs="+", help="адреси перших сторінок категорій")
+    parser.add_argument("-o", "--output", help="файл для запису (books.<формат>)")
+    parser.add_argument(
+        "-f", "--format", choices=EXPORT_MEDIA_TYPES, default="csv", dest="fmt"
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--max-requests", type=int, default=500)
+    args = parser.parse_args()
+
+    output = args.output or f"books.{EXPORT_EXTENSIONS[args.fmt]}"
+    asyncio.run(
+        export_to_file(
+            args.urls,
+            output,
+            args.fmt,
+            max_requests=args.max_requests,
+            batch_size=args.batch_size,
+        )
+    )
+    print(f"Книги записані у {output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import httpx
+
+# заголовки відповіді, які зберігаються разом з тілом сторінки
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CacheStats:
+    """Лічильники роботи кешу."""
+
+    # відповідь віддана з кешу без запиту в мережу
+    hits: int = 0
+    # застарілий запис підтверджений сервером (304 Not Modified)
+    revalidated: int = 0
+    # сторінка завантажена повністю
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Частка запитів, для яких не довелось завантажувати тіло сторінки."""
+        total = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / total if total else 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+@dataclass
+class CacheEntry:
+    """Збережена відповідь для однієї адреси."""
+
+    url: str
+    body: bytes
+    headers: dict[str, str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict[str, str]:
+        """Заголовки для умовного запиту (повторної перевірки) застарілого запису."""
+        headers = {}
+        if etag := self.headers.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def to_response(self) -> httpx.Response:
+        """Відповідь, яка виглядає так само, як і отримана з мережі."""
+        return httpx.Response(
+            200,
+            headers=self.headers,
+            content=self.body,
+            request=httpx.Request("GET", self.url),
+        )
+
+
+class HttpCache:
+    """
+    HTTP кеш відповідей на диску (SQLite) з ключем за адресою сторінки.
+    Коли загальний розмір тіл перевищує `max_size`, видаляються записи,
+    до яких найдовше не звертались (LRU).
+    """
+
+    def __init__(
+        self, db_path: str, *, ttl: float = 600, max_size: int = 50 * 1024 * 1024
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stats = CacheStats()
+        # з'єднання використовується з різних потоків (asyncio.to_thread),
+        # тому доступ до нього захищений блокуванням
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL;")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url          TEXT PRIMARY KEY,
+                body         BLOB NOT NULL,
+                headers      TEXT NOT NULL,
+                size         INTEGER NOT NULL,
+                expires_at   REAL NOT NULL,
+                last_access  REAL NOT NULL
+            );
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access);"
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _expires_at(self, headers: httpx.Headers) -> float:
+        """Час, до якого запис свіжий: `Cache-Control: max-age` або `ttl` за замовчуванням."""
+        if match := MAX_AGE_PATTERN.search(headers.get("cache-control", "")):
+            return time.time() + int(match.group(1))
+        return time.time() + self.ttl
+
+    def _get(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, headers, expires_at FROM responses WHERE url = ?;", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET last_access = ? WHERE url = ?;",
+                (time.time(), url),
+            )
+            self._connection.commit()
+
+        body, headers, expires_at = row
+        return CacheEntry(url, body, json.loads(headers), expires_at)
+
+    def _store(self, url: str, response: httpx.Response) -> None:
+        headers = {
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        }
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO responses (url, body, headers, size, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (
+                    url,
+                    response.content,
+                    json.dumps(headers),
+                    len(response.content),
+                    self._expires_at(response.headers),
+                    time.time(),
+                ),
+            )
+            # залишаємо записи, до яких звертались останніми, поки їх сумарний розмір
+            # не перевищує `max_size`, а решту видаляємо
+            cursor = self._connection.execute(
+                """
+                DELETE FROM responses WHERE url IN (
+                    SELECT url FROM (
+                        SELECT url, SUM(size) OVER (ORDER BY last_access DESC) AS total_size
+                        FROM responses
+                    )
+                    WHERE total_size > ?
+                );
+                """,
+                (self.max_size,),
+            )
+            self._connection.commit()
+        self.stats.evictions += cursor.rowcount
+
+    def _refresh(self, url: str, response: httpx.Response) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE url = ?;",
+                (self._expires_at(response.headers), time.time(), url),
+            )
+            self._connection.commit()
+
+    async def get(self, url: str) -> CacheEntry | None:
+        """Повертає збережений запис для `url` або `None`."""
+        return await asyncio.to_thread(self._get, url)
+
+    async def store(self, url: str, response: httpx.Response) -> None:
+        """Зберігає успішну відповідь, якщо сервер не заборонив кешування."""
+        if response.status_code != 200 or "no-store" in response.headers.get(
+            "cache-control", ""
+        ):
+            return
+        await asyncio.to_thread(self._store, url, response)
+
+    async def refresh(self, url: str, response: httpx.Response) -> None:
+        """Продовжує свіжість запису після відповіді `304 Not Modified`."""
+        await asyncio.to_thread(self._refresh, url, response)
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from crawler import Crawler, RequestBudget
+from parsers import BookRow, parse_category_page
+from pipeline import pagination_urls, run_parser
+
+BOOK_FIELDS = ("title", "price", "rating", "in_stock")
+
+
+@dataclass
+class StoredPage:
+    """Результат парсингу однієї сторінки разом з хешем її вмісту."""
+
+    url: str
+    category_url: str
+    content_hash: str
+    category: str
+    number_of_pages: int
+    books: list[BookRow]
+
+
+@dataclass
+class CrawlStats:
+    """Скільки сторінок завантажено, розпарсено і пропущено як незмінені."""
+
+    pages_fetched: int = 0
+    pages_parsed: int = 0
+    pages_skipped: int = 0
+
+
+@dataclass
+class CrawlDiff:
+    """Зміни в каталозі в порівнянні з попереднім запуском."""
+
+    added: list[dict[str, Any]] = field(default_factory=list)
+    removed: list[dict[str, Any]] = field(default_factory=list)
+    changed: list[dict[str, Any]] = field(default_factory=list)
+
+
+class CrawlStore:
+    """Локальне сховище (SQLite) хешів і результатів парсингу сторінок."""
+
+    def __init__(self, db_path: str) -> None:
+        # з'єднання використовується з різних потоків (asyncio.to_thread),
+        # тому доступ до нього захищений блокуванням
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url              TEXT PRIMARY KEY,
+                category_url     TEXT NOT NULL,
+                content_hash     TEXT NOT NULL,
+                category         TEXT NOT NULL,
+                number_of_pages  INTEGER NOT NULL,
+                books            TEXT NOT NULL
+            );
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_pages_category_url ON pages (category_url);"
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _category_pages(self, category_url: str) -> dict[str, StoredPage]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM pages WHERE category_url = ?;", (category_url,)
+            ).fetchall()
+
+        return {
+            url: StoredPage(
+                url,
+                category_url,
+                content_hash,
+                category,
+                number_of_pages,
+                [tuple(book) for book in json.loads(books)],
+            )
+            for url, category_url, content_hash, category, number_of_pages, books in rows
+        }
+
+    def _replace_category(self, category_url: str, pages: list[StoredPage]) -> None:
+        with self._lock, self._connection:
+            # сторінки, яких більше немає в пагінації, видаляються разом з їх книгами
+            self._connection.execute(
+                "DELETE FROM pages WHERE category_url = ?;", (category_url,)
+            )
+            self._connection.executemany(
+                "INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?);",
+                [
+                    (
+                        page.url,
+                        page.category_url,
+                        page.content_hash,
+                        page.category,
+                        page.number_of_pages,
+                        json.dumps(page.books),
+                    )
+                    for page in pages
+                ],
+            )
+
+    async def category_pages(self, category_url: str) -> dict[str, StoredPage]:
+        """Збережені сторінки категорії (перша і сторінки пагінації) за адресою."""
+        return await asyncio.to_thread(self._category_pages, category_url)
+
+    async def replace_category(
+        self, category_url: str, pages: list[StoredPage]
+    ) -> None:
+        """Замінює збережені сторінки категорії результатами поточного запуску."""
+        await asyncio.to_thread(self._replace_category, category_url, pages)
+
+
+def diff_books(
+    category: str, previous: list[BookRow], current: list[BookRow]
+) -> CrawlDiff:
+    """Порівнює книги категорії за назвою: додані, видалені і змінені (ціна, наявність, рейтинг)."""
+    previous_books = {book[0]: book for book in previous}
+    current_books = {book[0]: book for book in current}
+    diff = CrawlDiff()
+
+    for title, book in current_books.items():
+        old_book = previous_books.get(title)
+        if old_book is None:
+            diff.added.append({"category": category, **dict(zip(BOOK_FIELDS, book))})
+        elif old_book != book:
+            diff.changed.append(
+                {
+                    "category": category,
+                    "title": title,
+                    "changes": {
+                        name: [old_value, new_value]
+                        for name, old_value, new_value in zip(
+                            BOOK_FIELDS, old_book, book
+                        )
+                        if old_value != new_value
+                    },
+                }
+            )
+
+    for title, book in previous_books.items():
+        if title not in current_books:
+            diff.removed.append({"category": category, **dict(zip(BOOK_FIELDS, book))})
+
+    return diff
+
+
+class IncrementalCrawler:
+    """
+    Інкрементальний обхід категорій: сторінка, вміст якої не змінився з минулого
+    запуску (такий самий хеш), не парситься повторно, а її книги беруться зі сховища.
+    Разом з HTTP кешем рушія `crawler` незмінені сторінки коштують лише умовний запит (304).
+    """
+
+    def __init__(
+        self,
+        crawler: Crawler,
+        pool: ProcessPoolExecutor,
+        store: CrawlStore,
+        budget: RequestBudget,
+    ) -> None:
+        self.crawler = crawler
+        self.pool = pool
+        self.store = store
+        self.budget = budget
+        self.stats = CrawlStats()
+
+    async def crawl(self, urls: list[str]) -> CrawlDiff:
+        """Обходить категорії за адресами перших сторінок і повертає загальні зміни."""
+        diffs = await asyncio.gather(*(self.crawl_category(url) for url in urls))
+
+        result = CrawlDiff()
+        for diff in diffs:
+            result.added.extend(diff.added)
+            result.removed.extend(diff.removed)
+            result.changed.extend(diff.changed)
+        return result
+
+    async def crawl_category(self, category_url: str) -> CrawlDiff:
+        """Обходить одну категорію разом з пагінацією і оновлює її стан у сховищі."""
+        previous = await self.store.category_pages(category_url)
+
+        first_page = await self.fetch_page(category_url, category_url, previous)
+        next_pages = await asyncio.gather(
+            *(
+                self.fetch_page(url, category_url, previous)
+                for url in pagination_urls(
+                    httpx.URL(category_url), first_page.number_of_pages
+                )
+            )
+        )
+        pages = [first_page, *next_pages]
+        await self.store.replace_category(category_url, pages)
+
+        return diff_books(
+            first_page.category,
+            [book for page in previous.values() for book in page.books],
+            [book for page in pages for book in page.books],
+        )
+
+    async def fetch_page(
+        self, url: str, category_url: str, previous: dict[str, StoredPage]
+    ) -> StoredPage:
+        """Завантажує сторінку і парсить її тільки тоді, коли змінився її вміст."""
+        response = await self.crawler.fetch(url, budget=self.budget)
+        self.stats.pages_fetched += 1
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        stored_page = previous.get(url)
+        if stored_page is not None and stored_page.content_hash == content_hash:
+            self.stats.pages_skipped += 1
+            return stored_page
+
+        category, number_of_pages, books = await run_parser(
+            self.pool, parse_category_page, response.content
+        )
+        self.stats.pages_parsed += 1
+        return StoredPage(
+            url, category_url, content_hash, category, number_of_pages, books
+        )
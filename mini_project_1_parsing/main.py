@@ -1,14 +1,48 @@
 import asyncio
+import json
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from typing import Any
 
 import httpx
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, HTTPException, Query, status
+from crawler import CrawlBudgetExceeded, Crawler, RequestBudget
+from export import (
+    EXPORT_EXTENSIONS,
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    ExportFormatUnavailable,
+    create_writer,
+    export_books,
+)
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from http_cache import HttpCache
+from incremental import CrawlStore, IncrementalCrawler
+from parsers import BookRow, parse_categories, parse_category_page
+from pipeline import iter_category_pages, pagination_urls, run_parser
 from pydantic import BaseModel, HttpUrl
 
+from FastAPI.common.content_encoding import CompressionMiddleware
+
 # https://books.toscrape.com/
 
+# максимальна кількість запитів (разом з повторними) на один запит парсингу
+MAX_REQUESTS_PER_PARSE = 500
+# кількість процесів для парсингу HTML, одне ядро залишається для циклу подій
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# HTTP кеш завантажених сторінок
+HTTP_CACHE_DB = "http_cache.db"
+# скільки секунд сторінка вважається свіжою, якщо сервер не вказав `Cache-Control: max-age`
+HTTP_CACHE_TTL = 600
+HTTP_CACHE_MAX_SIZE = 100 * 1024 * 1024  # 100Mb
+
+# сховище хешів і результатів парсингу сторінок для інкрементального обходу
+CRAWL_STORE_DB = "crawl_store.db"
+
 
 class UrlToScrap(BaseModel):
     """Модель для даних адреси сайту для парсингу."""
@@ -16,112 +50,276 @@ class UrlToScrap(BaseModel):
     url: HttpUrl
 
 
-app = FastAPI(title="Parser API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Створення спільного рушія для завантаження сторінок (з HTTP кешем)
+    та пулу процесів для парсингу, і їх закриття після завершення роботи сервера.
+    """
+    cache = HttpCache(HTTP_CACHE_DB, ttl=HTTP_CACHE_TTL, max_size=HTTP_CACHE_MAX_SIZE)
+    crawl_store = CrawlStore(CRAWL_STORE_DB)
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as parse_pool:
+        async with Crawler(cache=cache) as crawler:
+            app.state.crawler = crawler
+            app.state.parse_pool = parse_pool
+            app.state.crawl_store = crawl_store
+            yield
+    crawl_store.close()
+    cache.close()
+
+
+app = FastAPI(title="Parser API", lifespan=lifespan)
+# JSON, NDJSON потік книг і CSV стискаються; Parquet і Arrow вже стиснені всередині файлу
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+def get_crawler(request: Request) -> Crawler:
+    """Повертає спільний для всіх запитів рушій для завантаження сторінок."""
+    return request.app.state.crawler
+
+
+def get_parse_pool(request: Request) -> ProcessPoolExecutor:
+    """Повертає пул процесів, в якому виконується парсинг HTML."""
+    return request.app.state.parse_pool
+
+
+def get_crawl_store(request: Request) -> CrawlStore:
+    """Повертає сховище результатів попередніх обходів."""
+    return request.app.state.crawl_store
 
 
 @app.get("/pages/")
 async def get_page(
     url: HttpUrl = Query(..., description="Адреса сторінки для отримання контенту."),
+    crawler: Crawler = Depends(get_crawler),
+    parse_pool: ProcessPoolExecutor = Depends(get_parse_pool),
 ) -> dict[Any, Any]:
     """Отримує список категорій книг зі сторінки з головного меню (sidebar)."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url.encoded_string(), follow_redirects=True)
-        if not response.is_success:
-            raise HTTPException(response.status_code, response.text)
+    response = await crawler.fetch(url.encoded_string(), follow_redirects=True)
+    if not response.is_success:
+        raise HTTPException(response.status_code, response.text)
 
-    content = response.content
-    soup = BeautifulSoup(content, "lxml")
-    sidebar = soup.find(class_="sidebar col-sm-4 col-md-3")
-    ul_elements = sidebar.find_all("ul")
+    categories = await run_parser(parse_pool, parse_categories, response.content)
 
     categories_urls: dict[str, str] = {}
-
-    for ul in ul_elements:
-        for li in ul.find_all("li"):
-            link = li.find("a")
-            if link:
-                categories_urls[link.getText(strip=True)] = (
-                    f"{url.scheme}://{url.host}/{link.get('href')}"
-                )
+    for name, href in categories:
+        categories_urls[name] = f"{url.scheme}://{url.host}/{href}"
 
     return categories_urls
 
 
+@app.get("/pages/cache/stats")
+async def get_cache_stats(
+    crawler: Crawler = Depends(get_crawler),
+) -> dict[str, int | float]:
+    """Статистика HTTP кешу сторінок: влучання, повторні перевірки, промахи."""
+    if crawler.cache is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "HTTP cache is disabled.")
+    return crawler.cache.stats.as_dict()
+
+
 @app.post("/pages/parse")
-async def parse_pages(urls: list[UrlToScrap]) -> defaultdict[str, list[dict[str, Any]]]:
+async def parse_pages(
+    urls: list[UrlToScrap],
+    crawler: Crawler = Depends(get_crawler),
+    parse_pool: ProcessPoolExecutor = Depends(get_parse_pool),
+) -> defaultdict[str, list[dict[str, Any]]]:
     """
     Парсить сторінки книг, проходить по пагінації та повертає дані по книгах
     згруповані за категоріями.
     """
+    # один бюджет на перші сторінки і на сторінки пагінації
+    budget = RequestBudget(MAX_REQUESTS_PER_PARSE)
+
     try:
-        first_pages = await get_pages([url.url for url in urls])
+        first_pages = await get_pages(
+            crawler, [url.url.encoded_string() for url in urls], budget
+        )
+    except CrawlBudgetExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         ) from e
 
-    next_pages_urls = []
-    for page in first_pages:
-        soup = BeautifulSoup(page.content, "lxml")
+    # кожна сторінка парситься один раз: з першої сторінки беремо і книги, і пагінацію
+    first_pages_data = await parse_contents(parse_pool, first_pages)
 
-        if pager := soup.find("ul", class_="pager"):
-            number_of_pages = int(
-                pager.find_next("li", class_="current").get_text(strip=True).split()[-1]
-            )
-            for n in range(1, number_of_pages + 1):
-                if n == 1:
-                    continue
+    next_pages_urls = []
+    for page, (_, number_of_pages, _) in zip(first_pages, first_pages_data):
+        next_pages_urls.extend(pagination_urls(page.request.url, number_of_pages))
 
-                next_pages_urls.append(
-                    HttpUrl(
-                        f"{page.request.url.scheme}://{page.request.url.host}{'/'.join(page.request.url.path.split('/')[:-1])}/page-{n}.html"
-                    )
-                )
     try:
-        all_pages = first_pages + await get_pages(next_pages_urls)
+        next_pages = await get_pages(crawler, next_pages_urls, budget)
+    except CrawlBudgetExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         ) from e
 
-    books_info = defaultdict(list[Any])
+    next_pages_data = await parse_contents(parse_pool, next_pages)
 
-    for page in all_pages:
-        soup = BeautifulSoup(page.content, "lxml")
-        books_section = soup.find(class_="col-sm-8 col-md-9")
-
-        book_category = books_section.find("div", class_="page-header action").get_text(
-            strip=True
-        )
-
-        ol = books_section.find("ol", class_="row")
-
-        for li in ol.find_all("li"):
-            title = li.find("h3").find("a").get("title")
-            price = li.select_one("p.price_color").text.strip()
-            in_stock = li.select_one("p.instock.availability").get_text(strip=True)
-            rating_raw = li.find("p", class_="star-rating").get("class")[-1]
+    books_info = defaultdict(list[Any])
 
-            rating_to_digit = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+    for book_category, _, books in first_pages_data + next_pages_data:
+        for title, price, rating, in_stock in books:
             books_info[book_category].append(
                 {
                     "title": title,
                     "price": price,
-                    "rating": rating_to_digit[rating_raw],
-                    "in_stock": bool(in_stock),
+                    "rating": rating,
+                    "in_stock": in_stock,
                 }
             )
 
     return books_info
 
 
-async def get_pages(urls: list[HttpUrl]) -> list[httpx.Response]:
-    """Асинхронно отримує вміст сторінок за списком URL-адрес."""
-    async with httpx.AsyncClient() as client:
+@app.post("/pages/parse/stream", response_class=StreamingResponse)
+async def parse_pages_stream(
+    urls: list[UrlToScrap],
+    crawler: Crawler = Depends(get_crawler),
+    parse_pool: ProcessPoolExecutor = Depends(get_parse_pool),
+) -> StreamingResponse:
+    """
+    Потоковий варіант `/pages/parse`: повертає книги у форматі NDJSON
+    (один JSON об'єкт на рядок) одразу, як тільки оброблена кожна сторінка,
+    тому ні час до першого байта, ні використана пам'ять не залежать від розміру каталогу.
+    """
+    budget = RequestBudget(MAX_REQUESTS_PER_PARSE)
+
+    async def books_records():
         try:
-            tasks = [client.get(url.encoded_string()) for url in urls]
-            responses = await asyncio.gather(*tasks)
-        except httpx.RequestError as e:
-            raise e
+            async for book_category, books in iter_category_pages(
+                crawler, parse_pool, [url.url.encoded_string() for url in urls], budget
+            ):
+                yield "".join(
+                    json.dumps(
+                        {
+                            "category": book_category,
+                            "title": title,
+                            "price": price,
+                            "rating": rating,
+                            "in_stock": in_stock,
+                        },
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                    for title, price, rating, in_stock in books
+                )
+        except (CrawlBudgetExceeded, httpx.RequestError) as e:
+            # статус відповіді вже відправлений, тому помилка передається останнім записом
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(books_records(), media_type="application/x-ndjson")
+
+
+@app.post("/pages/export", response_class=StreamingResponse)
+async def export_pages(
+    urls: list[UrlToScrap],
+    export_format: ExportFormat = Query(
+        "csv", alias="format", description="Формат файлу: csv, parquet або arrow."
+    ),
+    crawler: Crawler = Depends(get_crawler),
+    parse_pool: ProcessPoolExecutor = Depends(get_parse_pool),
+) -> StreamingResponse:
+    """
+    Експорт книг з категорій у файл CSV, Parquet або Arrow (потоковий формат IPC)
+    з ціною у вигляді числа. Книги записуються партіями по мірі парсингу сторінок.
+    Parquet і Arrow потребують встановленого pyarrow.
+    """
+    try:
+        writer = create_writer(export_format)
+    except ExportFormatUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e)
+        ) from e
+
+    chunks = export_books(
+        iter_category_pages(
+            crawler,
+            parse_pool,
+            [url.url.encoded_string() for url in urls],
+            RequestBudget(MAX_REQUESTS_PER_PARSE),
+        ),
+        writer,
+    )
+
+    # перша частина файлу отримується до відправки статусу відповіді,
+    # щоб помилки завантаження перших сторінок повернулись звичайною відповіддю з помилкою
+    try:
+        first_chunk = await anext(chunks)
+    except CrawlBudgetExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        ) from e
+
+    async def file_chunks():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    filename = f"books.{EXPORT_EXTENSIONS[export_format]}"
+    return StreamingResponse(
+        file_chunks(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/pages/parse/incremental")
+async def parse_pages_incremental(
+    urls: list[UrlToScrap],
+    crawler: Crawler = Depends(get_crawler),
+    parse_pool: ProcessPoolExecutor = Depends(get_parse_pool),
+    crawl_store: CrawlStore = Depends(get_crawl_store),
+) -> dict[str, Any]:
+    """
+    Інкрементальний обхід категорій: повторно парсяться тільки змінені сторінки,
+    а у відповіді повертаються зміни в порівнянні з попереднім обходом
+    (додані, видалені книги і книги зі зміненою ціною, наявністю або рейтингом).
+    """
+    incremental = IncrementalCrawler(
+        crawler, parse_pool, crawl_store, RequestBudget(MAX_REQUESTS_PER_PARSE)
+    )
+
+    try:
+        diff = await incremental.crawl([url.url.encoded_string() for url in urls])
+    except CrawlBudgetExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        ) from e
+
+    return {"diff": asdict(diff), "stats": asdict(incremental.stats)}
+
+
+async def get_pages(
+    crawler: Crawler, urls: list[str], budget: RequestBudget
+) -> list[httpx.Response]:
+    """
+    Асинхронно отримує вміст сторінок за списком URL-адрес.
+    Кількість одночасних запитів до одного хоста обмежується рушієм `crawler`.
+    """
+    return await crawler.fetch_all(urls, budget=budget)
+
 
-    return responses
+async def parse_contents(
+    pool: ProcessPoolExecutor, pages: list[httpx.Response]
+) -> list[tuple[str, int, list[BookRow]]]:
+    """Паралельно парсить сторінки категорій в пулі процесів."""
+    return await asyncio.gather(
+        *(run_parser(pool, parse_category_page, page.content) for page in pages)
+    )
@@ -0,0 +1,83 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+
+# Функції цього модуля виконуються в окремих процесах (ProcessPoolExecutor),
+# тому вони отримують тільки байти сторінки і повертають прості кортежі,
+# які дешево передаються між процесами (pickle).
+
+# (назва, ціна, рейтинг, наявність)
+BookRow = tuple[str, str, int, bool]
+
+# будується тільки потрібна частина сторінки, а решта (header, footer) пропускається
+SIDEBAR = SoupStrainer(class_="sidebar col-sm-4 col-md-3")
+
+# Сторінки категорій парсяться найчастіше, тому для них використовується lxml напряму:
+# XPath вирази компілюються один раз при імпорті модуля, а не для кожної сторінки чи книги.
+HTML_PARSER = etree.HTMLParser()
+BOOKS_SECTION_XPATH = etree.XPath('//div[@class="col-sm-8 col-md-9"]')
+CATEGORY_XPATH = etree.XPath('string(.//div[@class="page-header action"])')
+CURRENT_PAGE_XPATH = etree.XPath('string(.//ul[@class="pager"]/li[@class="current"])')
+PRODUCTS_XPATH = etree.XPath('.//ol[@class="row"]/li')
+
+RATING_TO_DIGIT = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+
+def parse_categories(content: bytes) -> list[tuple[str, str]]:
+    """Повертає пари (назва категорії, відносне посилання) з головного меню (sidebar)."""
+    soup = BeautifulSoup(content, "lxml", parse_only=SIDEBAR)
+
+    categories = []
+    for ul in soup.find_all("ul"):
+        for li in ul.find_all("li"):
+            link = li.find("a")
+            if link:
+                categories.append((link.getText(strip=True), link.get("href")))
+
+    return categories
+
+
+def extract_book(product: etree._Element) -> BookRow:
+    """
+    Дані однієї книги за один обхід елемента `li` товару: кожен потрібний тег
+    розпізнається за його класом, без окремого пошуку по дереву для кожного поля.
+    """
+    title, price, rating, in_stock = None, None, None, False
+    for element in product.iter("h3", "p"):
+        if element.tag == "h3":
+            title = element.find("a").get("title")
+            continue
+
+        classes = element.get("class", "").split()
+        if not classes:
+            continue
+        if classes[0] == "star-rating":
+            rating = RATING_TO_DIGIT[classes[-1]]
+        elif classes[0] == "price_color":
+            price = element.text.strip()
+        elif classes[0] == "instock":
+            in_stock = bool("".join(element.itertext()).strip())
+
+    return title, price, rating, in_stock
+
+
+def parse_category_page(content: bytes) -> tuple[str, int, list[BookRow]]:
+    """
+    Повертає назву категорії, кількість сторінок пагінації
+    та дані по книгах зі сторінки категорії за один прохід.
+    """
+    root = etree.fromstring(content, HTML_PARSER)
+    books_section = next(iter(BOOKS_SECTION_XPATH(root)), None)
+    if books_section is None:
+        # так само, як і при пошуку через BeautifulSoup на сторінці іншого типу
+        raise AttributeError("Сторінка не є сторінкою категорії книг")
+
+    book_category = CATEGORY_XPATH(books_section).strip()
+
+    number_of_pages = 1
+    if current_page := CURRENT_PAGE_XPATH(books_section).split():
+        # "Page 1 of N"
+        number_of_pages = int(current_page[-1])
+
+    books = [extract_book(product) for product in PRODUCTS_XPATH(books_section)]
+
+    return book_category, number_of_pages, books
@@ -0,0 +1,89 @@
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import httpx
+from crawler import Crawler, RequestBudget
+from parsers import BookRow, parse_category_page
+
+# скільки сторінок одночасно завантажуються і чекають на парсинг;
+# обмежує пам'ять, коли сторінки завантажуються швидше, ніж парсяться
+MAX_PAGES_IN_FLIGHT = 32
+
+
+async def run_parser(pool: ProcessPoolExecutor, parser, content: bytes) -> Any:
+    """
+    Виконує парсинг сторінки в пулі процесів, щоб не блокувати цикл подій (event loop)
+    і не затримувати обробку запитів інших клієнтів.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, parser, content)
+
+
+def pagination_urls(page_url: httpx.URL, number_of_pages: int) -> list[str]:
+    """Адреси сторінок пагінації (page-2.html ... page-N.html) для першої сторінки категорії."""
+    directory = "/".join(page_url.path.split("/")[:-1])
+    return [
+        str(page_url.copy_with(path=f"{directory}/page-{n}.html"))
+        for n in range(2, number_of_pages + 1)
+    ]
+
+
+async def fetch_and_parse(
+    crawler: Crawler,
+    pool: ProcessPoolExecutor,
+    url: str,
+    budget: RequestBudget,
+    in_flight: asyncio.Semaphore,
+) -> tuple[httpx.URL, tuple[str, int, list[BookRow]]]:
+    """
+    Завантажує сторінку категорії і одразу передає її на парсинг.
+    Повертається тільки адреса сторінки і результат парсингу, щоб вміст сторінки
+    не залишався в пам'яті до моменту видачі книг.
+    """
+    async with in_flight:
+        response = await crawler.fetch(url, budget=budget)
+        parsed = await run_parser(pool, parse_category_page, response.content)
+    return response.request.url, parsed
+
+
+async def iter_category_pages(
+    crawler: Crawler,
+    pool: ProcessPoolExecutor,
+    urls: list[str],
+    budget: RequestBudget,
+) -> AsyncIterator[tuple[str, list[BookRow]]]:
+    """
+    Конвеєр завантаження -> парсингу -> видачі: повертає книги кожної сторінки
+    (категорія, книги) одразу, як тільки ця сторінка оброблена.
+    Сторінки пагінації додаються в роботу, щойно розпарсена перша сторінка категорії,
+    не чекаючи на інші категорії.
+    """
+    in_flight = asyncio.Semaphore(MAX_PAGES_IN_FLIGHT)
+    # задача -> чи це перша сторінка категорії
+    tasks = {
+        asyncio.create_task(
+            fetch_and_parse(crawler, pool, url, budget, in_flight)
+        ): True
+        for url in urls
+    }
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                is_first_page = tasks.pop(task)
+                page_url, (book_category, number_of_pages, books) = task.result()
+
+                if is_first_page:
+                    for url in pagination_urls(page_url, number_of_pages):
+                        task = asyncio.create_task(
+                            fetch_and_parse(crawler, pool, url, budget, in_flight)
+                        )
+                        tasks[task] = False
+
+                yield book_category, books
+    finally:
+        # якщо клієнт відключився або сталась помилка, решта сторінок не потрібна
+        for task in tasks:
+            task.cancel()
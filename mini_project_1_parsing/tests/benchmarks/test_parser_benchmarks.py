@@ -0,0 +1,177 @@
+import os
+import re
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+import pytest_asyncio
+from crawler import Crawler
+from main import app, get_crawler, get_parse_pool
+from parsers import parse_category_page
+
+# Бенчмарки довгі, тому запускаються тільки явно:
+# RUN_BENCHMARKS=1 pytest tests/benchmarks -s
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"), reason="Set RUN_BENCHMARKS=1 to run."
+)
+
+BOOKS_BASE_URL = "https://books.toscrape.com"
+NUMBER_OF_PAGES = (10, 100, 1000)
+PAGES_PER_CATEGORY = 10
+BOOKS_PER_PAGE = 20
+
+# межі, перевищення яких вважається регресією продуктивності
+MAX_PARSE_TIME_PER_PAGE = 0.01  # секунд
+MIN_PAGES_PER_SECOND = 5
+MAX_PEAK_MEMORY_PER_PAGE = 512 * 1024  # байтів
+
+SYNTHETIC_PAGE = re.compile(
+    r"/catalogue/category/books/synthetic_(\d+)/(?:index|page-(\d+))\.html"
+)
+
+
+class StandInSite:
+    """
+    Локальна заміна сайту: збережені сторінки віддаються як є, а категорії
+    `synthetic_<n>` з `PAGES_PER_CATEGORY` сторінками будуються зі збереженої
+    сторінки категорії Mystery, тому каталог може бути будь-якого розміру.
+    """
+
+    def __init__(self, saved_page_handler) -> None:
+        self.saved_page_handler = saved_page_handler
+        template = saved_page_handler(
+            httpx.Request(
+                "GET",
+                f"{BOOKS_BASE_URL}/catalogue/category/books/mystery_3/index.html",
+            )
+        )
+        self.template = template.text
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        match = SYNTHETIC_PAGE.fullmatch(request.url.path)
+        if match is None:
+            return self.saved_page_handler(request)
+
+        category, page = match.group(1), int(match.group(2) or 1)
+        content = self.template.replace(
+            "<h1>Mystery</h1>", f"<h1>Synthetic {category}</h1>"
+        ).replace("Page 1 of 2", f"Page {page} of {PAGES_PER_CATEGORY}")
+        return httpx.Response(200, text=content, headers={"Content-Type": "text/html"})
+
+
+def category_urls(number_of_pages: int) -> list[dict[str, str]]:
+    return [
+        {"url": f"{BOOKS_BASE_URL}/catalogue/category/books/synthetic_{n}/index.html"}
+        for n in range(number_of_pages // PAGES_PER_CATEGORY)
+    ]
+
+
+async def measure(request) -> tuple[httpx.Response, float, int]:
+    """
+    Повертає відповідь, час виконання запиту і пікове використання пам'яті процесом API.
+    Пам'ять вимірюється окремим запуском, бо `tracemalloc` сповільнює виконання.
+    """
+    start = time.perf_counter()
+    response = await request()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    await request()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return response, elapsed, peak_memory
+
+
+def report(name: str, number_of_pages: int, elapsed: float, peak_memory: int) -> None:
+    print(
+        f"\n{name:<20} сторінок: {number_of_pages:>5} | "
+        f"{number_of_pages / elapsed:>8.1f} сторінок/с | "
+        f"пам'ять: {peak_memory / 1024 / 1024:>7.2f} Mb"
+    )
+    assert number_of_pages / elapsed >= MIN_PAGES_PER_SECOND
+    assert peak_memory / number_of_pages <= MAX_PEAK_MEMORY_PER_PAGE
+
+
+@pytest_asyncio.fixture
+async def client(saved_page_handler, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("main.MAX_REQUESTS_PER_PARSE", max(NUMBER_OF_PAGES) * 2)
+
+    with ProcessPoolExecutor() as parse_pool:
+        async with Crawler(
+            transport=httpx.MockTransport(StandInSite(saved_page_handler))
+        ) as crawler:
+            app.dependency_overrides[get_crawler] = lambda: crawler
+            app.dependency_overrides[get_parse_pool] = lambda: parse_pool
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://127.0.0.1:8000",
+                timeout=None,
+            ) as client:
+                yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("number_of_pages", NUMBER_OF_PAGES)
+def test_parse_time_per_page(saved_page_handler, number_of_pages: int) -> None:
+    site = StandInSite(saved_page_handler)
+    page = site(httpx.Request("GET", category_urls(PAGES_PER_CATEGORY)[0]["url"]))
+    pages = [page.content] * number_of_pages
+
+    start = time.perf_counter()
+    for content in pages:
+        parse_category_page(content)
+    parse_time_per_page = (time.perf_counter() - start) / number_of_pages
+
+    print(
+        f"\nparse_category_page  сторінок: {number_of_pages:>5} | "
+        f"{parse_time_per_page * 1000:.3f} мс на сторінку"
+    )
+    assert parse_time_per_page <= MAX_PARSE_TIME_PER_PAGE
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_of_pages", NUMBER_OF_PAGES)
+async def test_get_page(client: httpx.AsyncClient, number_of_pages: int) -> None:
+    async def request():
+        for _ in range(number_of_pages):
+            response = await client.get("/pages/", params={"url": BOOKS_BASE_URL})
+        return response
+
+    response, elapsed, peak_memory = await measure(request)
+
+    assert len(response.json()) == 51
+    report("get_page", number_of_pages, elapsed, peak_memory)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_of_pages", NUMBER_OF_PAGES)
+async def test_parse_pages(client: httpx.AsyncClient, number_of_pages: int) -> None:
+    urls = category_urls(number_of_pages)
+
+    response, elapsed, peak_memory = await measure(
+        lambda: client.post("/pages/parse", json=urls)
+    )
+
+    assert sum(len(books) for books in response.json().values()) == (
+        number_of_pages * BOOKS_PER_PAGE
+    )
+    report("parse_pages", number_of_pages, elapsed, peak_memory)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("number_of_pages", NUMBER_OF_PAGES)
+async def test_parse_pages_stream(
+    client: httpx.AsyncClient, number_of_pages: int
+) -> None:
+    urls = category_urls(number_of_pages)
+
+    response, elapsed, peak_memory = await measure(
+        lambda: client.post("/pages/parse/stream", json=urls)
+    )
+
+    assert len(response.text.splitlines()) == number_of_pages * BOOKS_PER_PAGE
+    report("parse_pages_stream", number_of_pages, elapsed, peak_memory)
@@ -0,0 +1,38 @@
+import pathlib
+import sys
+
+import httpx
+import pytest
+
+# модулі міні-проєкту імпортуються так само, як при запуску `uvicorn main:app` з його папки
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1]))
+# спільний код (`FastAPI.common`) імпортується з папки, в якій лежить репозиторій FastAPI
+sys.path.insert(1, str(pathlib.Path(__file__).parents[3]))
+
+# збережені сторінки сайту https://books.toscrape.com/ (fixtures/<host>/<path>)
+FIXTURES_PATH = pathlib.Path(__file__).parent / "fixtures"
+
+
+def serve_saved_page(request: httpx.Request) -> httpx.Response:
+    """Локальна заміна сайту, яка віддає збережену сторінку за шляхом запиту."""
+    page = (
+        FIXTURES_PATH
+        / request.url.host
+        / (request.url.path.lstrip("/") or "index.html")
+    )
+    if not page.is_file():
+        return httpx.Response(404, text="<h1>Not Found</h1>")
+
+    return httpx.Response(
+        200, content=page.read_bytes(), headers={"Content-Type": "text/html"}
+    )
+
+
+@pytest.fixture
+def saved_page_handler():
+    return serve_saved_page
+
+
+@pytest.fixture
+def books_transport() -> httpx.MockTransport:
+    return httpx.MockTransport(serve_saved_page)
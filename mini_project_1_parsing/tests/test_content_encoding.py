@@ -0,0 +1,130 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+
+from FastAPI.common.content_encoding import CompressionMiddleware, choose_encoding
+
+LARGE_TEXT = "books.toscrape.com " * 200
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large() -> PlainTextResponse:
+        return PlainTextResponse(LARGE_TEXT)
+
+    @app.get("/small")
+    async def small() -> PlainTextResponse:
+        return PlainTextResponse("small")
+
+    @app.get("/image")
+    async def image() -> Response:
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def lines():
+            for n in range(100):
+                yield json.dumps({"n": n, "title": LARGE_TEXT[:50]}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+async def get(app: FastAPI, path: str, accept_encoding: str) -> httpx.Response:
+    """Відповідь на GET запит з вказаним `Accept-Encoding` (httpx розпаковує тіло сам)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        request = client.build_request(
+            "GET", path, headers={"Accept-Encoding": accept_encoding}
+        )
+        response = await client.send(request, stream=True)
+        await response.aread()
+        return response
+
+
+async def raw_body(response: httpx.Response) -> bytes:
+    return b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+def test_choose_encoding() -> None:
+    preferred = ("zstd", "br", "gzip")
+    assert choose_encoding("gzip, deflate", preferred) == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0.5", preferred) == "gzip"
+    assert choose_encoding("*", preferred) == "zstd"
+    assert choose_encoding("gzip;q=0", preferred) is None
+    assert choose_encoding("", preferred) is None
+
+
+@pytest.mark.asyncio
+async def test_large_response_is_compressed(app: FastAPI) -> None:
+    response = await get(app, "/large", "gzip")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) < len(LARGE_TEXT)
+    assert response.text == LARGE_TEXT
+
+
+@pytest.mark.asyncio
+async def test_compressed_body_is_gzip(app: FastAPI) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with client.stream(
+            "GET", "/large", headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            compressed = await raw_body(response)
+
+    assert len(compressed) == int(response.headers["Content-Length"])
+    assert gzip.decompress(compressed) == LARGE_TEXT.encode()
+
+
+@pytest.mark.asyncio
+async def test_small_response_is_not_compressed(app: FastAPI) -> None:
+    response = await get(app, "/small", "gzip")
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.text == "small"
+
+
+@pytest.mark.asyncio
+async def test_not_allowed_media_type_is_not_compressed(app: FastAPI) -> None:
+    response = await get(app, "/image", "gzip")
+
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+    assert response.content == b"\x89PNG" * 1000
+
+
+@pytest.mark.asyncio
+async def test_without_accept_encoding_response_is_not_compressed(
+    app: FastAPI,
+) -> None:
+    response = await get(app, "/large", "identity")
+
+    assert "Content-Encoding" not in response.headers
+    assert response.text == LARGE_TEXT
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_compressed_by_chunks(app: FastAPI) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with client.stream(
+            "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            compressed = await raw_body(response)
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = gzip.decompress(compressed).decode().splitlines()
+    assert [json.loads(line)["n"] for line in lines] == list(range(100))
@@ -0,0 +1,301 @@
+import asyncio
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+import pytest_asyncio
+from crawler import CrawlBudgetExceeded, Crawler, RequestBudget
+from main import app, get_crawler, get_parse_pool
+
+BOOKS_BASE_URL = "https://books.toscrape.com"
+TRAVEL_URL = f"{BOOKS_BASE_URL}/catalogue/category/books/travel_2/index.html"
+MYSTERY_URL = f"{BOOKS_BASE_URL}/catalogue/category/books/mystery_3/index.html"
+
+
+@pytest.mark.asyncio
+async def test_fetch_saved_page(books_transport: httpx.MockTransport) -> None:
+    async with Crawler(transport=books_transport) as crawler:
+        response = await crawler.fetch(TRAVEL_URL)
+
+    assert response.status_code == 200
+    assert "Travel" in response.text
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_respects_per_host_limit() -> None:
+    running = 0
+    max_running = 0
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return httpx.Response(200)
+
+    async with Crawler(
+        transport=httpx.MockTransport(handler), per_host_limit=3
+    ) as crawler:
+        responses = await crawler.fetch_all(
+            [f"{BOOKS_BASE_URL}/page-{n}.html" for n in range(20)]
+        )
+
+    assert len(responses) == 20
+    assert max_running == 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_failed_responses() -> None:
+    calls = 0
+
+    def handler(_: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503 if calls < 3 else 200)
+
+    async with Crawler(
+        transport=httpx.MockTransport(handler), backoff_factor=0
+    ) as crawler:
+        response = await crawler.fetch(TRAVEL_URL)
+
+    assert response.status_code == 200
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_raises_after_last_retry() -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    async with Crawler(
+        transport=httpx.MockTransport(handler), max_retries=2, backoff_factor=0
+    ) as crawler:
+        with pytest.raises(httpx.ConnectError):
+            await crawler.fetch(TRAVEL_URL)
+
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_stops_on_exhausted_budget(
+    books_transport: httpx.MockTransport,
+) -> None:
+    budget = RequestBudget(limit=2)
+
+    async with Crawler(transport=books_transport) as crawler:
+        with pytest.raises(CrawlBudgetExceeded):
+            await crawler.fetch_all(
+                [TRAVEL_URL, MYSTERY_URL, TRAVEL_URL], budget=budget
+            )
+
+    assert budget.used == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_cancels_other_requests_on_error() -> None:
+    cancelled = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal cancelled
+        if request.url.path == "/fail.html":
+            raise httpx.ConnectError("Connection refused", request=request)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return httpx.Response(200)
+
+    async with Crawler(
+        transport=httpx.MockTransport(handler), max_retries=0
+    ) as crawler:
+        with pytest.raises(httpx.ConnectError):
+            await crawler.fetch_all(
+                [f"{BOOKS_BASE_URL}/page-{n}.html" for n in range(3)]
+                + [f"{BOOKS_BASE_URL}/fail.html"]
+            )
+        # інші запити скасовані ще до повернення помилки
+        assert cancelled == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_capped() -> None:
+    async with Crawler(max_retry_after=5) as crawler:
+        long_delay = httpx.Response(503, headers={"Retry-After": "3600"})
+        short_delay = httpx.Response(503, headers={"Retry-After": "2"})
+
+        assert crawler._retry_delay(0, long_delay) == 5
+        assert crawler._retry_delay(0, short_delay) == 2
+
+
+@pytest_asyncio.fixture
+async def client(books_transport: httpx.MockTransport):
+    with ProcessPoolExecutor(max_workers=2) as parse_pool:
+        async with Crawler(transport=books_transport) as crawler:
+            app.dependency_overrides[get_crawler] = lambda: crawler
+            app.dependency_overrides[get_parse_pool] = lambda: parse_pool
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://127.0.0.1:8000",
+            ) as client:
+                yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_page_return_categories_url(client: httpx.AsyncClient) -> None:
+    response = await client.get("/pages/", params={"url": BOOKS_BASE_URL})
+
+    assert response.status_code == 200
+    response_data = response.json()
+    assert len(response_data) == 51
+    assert response_data["Travel"] == TRAVEL_URL
+
+
+@pytest.mark.asyncio
+async def test_get_page_page_not_found(client: httpx.AsyncClient) -> None:
+    response = await client.get(
+        "/pages/", params={"url": f"{BOOKS_BASE_URL}/not_found.html"}
+    )
+
+    assert response.status_code == 404
+    assert "Not Found" in response.text
+
+
+@pytest.mark.asyncio
+async def test_parse_pages(client: httpx.AsyncClient) -> None:
+    response = await client.post(
+        "/pages/parse", json=[{"url": TRAVEL_URL}, {"url": MYSTERY_URL}]
+    )
+
+    assert response.status_code == 200
+    response_data = response.json()
+    assert len(response_data["Travel"]) == 11
+    assert len(response_data["Mystery"]) == 32
+    assert response_data["Travel"][0] == {
+        "title": "It's Only the Himalayas",
+        "price": "£45.17",
+        "rating": 2,
+        "in_stock": True,
+    }
+
+
+@pytest.mark.asyncio
+async def test_parse_pages_budget_exceeded(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("main.MAX_REQUESTS_PER_PARSE", 2)
+
+    response = await client.post(
+        "/pages/parse", json=[{"url": TRAVEL_URL}, {"url": MYSTERY_URL}]
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Request budget of 2 requests is exceeded."}
+
+
+@pytest.mark.asyncio
+async def test_parse_pages_not_a_category_page(client: httpx.AsyncClient) -> None:
+    with pytest.raises(AttributeError):
+        await client.post(
+            "/pages/parse",
+            json=[
+                {"url": f"{BOOKS_BASE_URL}/catalogue/category/books/travel_2index.html"}
+            ],
+        )
+
+
+@pytest.mark.asyncio
+async def test_parse_pages_stream(client: httpx.AsyncClient) -> None:
+    response = await client.post(
+        "/pages/parse/stream", json=[{"url": TRAVEL_URL}, {"url": MYSTERY_URL}]
+    )
+
+    assert response.status_code == 200
+    assert response.headers.get("Content-Type") == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 43
+    assert sum(record["category"] == "Mystery" for record in records) == 32
+    assert {
+        "category": "Travel",
+        "title": "It's Only the Himalayas",
+        "price": "£45.17",
+        "rating": 2,
+        "in_stock": True,
+    } in records
+
+
+@pytest.mark.asyncio
+async def test_parse_pages_stream_budget_exceeded(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("main.MAX_REQUESTS_PER_PARSE", 1)
+
+    # одна категорія: перша сторінка вкладається в ліміт, а друга вже ні,
+    # тому результат не залежить від порядку обробки сторінок різних категорій
+    response = await client.post("/pages/parse/stream", json=[{"url": MYSTERY_URL}])
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 20 + 1
+    assert all(record["category"] == "Mystery" for record in records[:-1])
+    assert records[-1] == {"error": "Request budget of 1 requests is exceeded."}
+
+
+@pytest.mark.asyncio
+async def test_export_pages_csv(client: httpx.AsyncClient) -> None:
+    response = await client.post(
+        "/pages/export", json=[{"url": TRAVEL_URL}, {"url": MYSTERY_URL}]
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/csv")
+    assert 'filename="books.csv"' in response.headers["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 43
+    assert {
+        "category": "Travel",
+        "title": "It's Only the Himalayas",
+        "price": "45.17",
+        "currency": "£",
+        "rating": "2",
+        "in_stock": "True",
+    } in rows
+
+
+@pytest.mark.asyncio
+async def test_export_pages_parquet(client: httpx.AsyncClient) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    response = await client.post(
+        "/pages/export", params={"format": "parquet"}, json=[{"url": MYSTERY_URL}]
+    )
+
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 32
+    assert table.schema.field("price").type == "double"
+    assert table.column("title")[0].as_py() == "Sharp Objects"
+    assert table.column("price")[0].as_py() == 47.82
+
+
+@pytest.mark.asyncio
+async def test_export_pages_budget_exceeded(
+    client: httpx.AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("main.MAX_REQUESTS_PER_PARSE", 2)
+
+    response = await client.post(
+        "/pages/export", json=[{"url": TRAVEL_URL}, {"url": MYSTERY_URL}]
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Request budget of 2 requests is exceeded."}
@@ -0,0 +1,52 @@
+import pytest
+from export import CsvExportWriter, export_books, parse_price, write_file_atomically
+
+
+def test_parse_price() -> None:
+    assert parse_price("£45.17") == (45.17, "£")
+    assert parse_price(None) == (None, None)
+    assert parse_price("£") == (None, None)
+    assert parse_price("n/a") == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_export_books_with_missing_price() -> None:
+    async def pages():
+        yield "Travel", [("Book", "£10.00", 3, True), ("No price", None, 1, False)]
+
+    chunks = [chunk async for chunk in export_books(pages(), CsvExportWriter())]
+
+    assert b"".join(chunks).decode().splitlines() == [
+        "category,title,price,currency,rating,in_stock",
+        "Travel,Book,10.0,£,3,True",
+        "Travel,No price,,,1,False",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_write_file_atomically(tmp_path) -> None:
+    output = tmp_path / "books.csv"
+
+    async def chunks():
+        yield b"a,"
+        yield b"b\n"
+
+    await write_file_atomically(chunks(), str(output))
+
+    assert output.read_bytes() == b"a,b\n"
+    assert list(tmp_path.iterdir()) == [output]
+
+
+@pytest.mark.asyncio
+async def test_write_file_atomically_removes_partial_file(tmp_path) -> None:
+    output = tmp_path / "books.csv"
+
+    async def chunks():
+        yield b"a,b\n"
+        raise RuntimeError("Network error")
+
+    with pytest.raises(RuntimeError):
+        await write_file_atomically(chunks(), str(output))
+
+    # ні обрізаного файлу, ні тимчасового
+    assert list(tmp_path.iterdir()) == []
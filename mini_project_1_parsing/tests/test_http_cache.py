@@ -0,0 +1,83 @@
+import httpx
+import pytest
+from crawler import Crawler
+from http_cache import HttpCache
+
+PAGE_URL = "https://books.toscrape.com/catalogue/category/books/travel_2/index.html"
+
+
+class VersionedSite:
+    """Сайт, який віддає `ETag` і відповідає 304 на умовні запити до незміненої сторінки."""
+
+    def __init__(self) -> None:
+        self.version = 1
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        etag = f'"v{self.version}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(
+            200, headers={"ETag": etag}, text=f"{request.url.path} v{self.version}"
+        )
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_served_without_network(tmp_path) -> None:
+    site = VersionedSite()
+    cache = HttpCache(str(tmp_path / "cache.db"), ttl=60)
+
+    async with Crawler(transport=httpx.MockTransport(site), cache=cache) as crawler:
+        first = await crawler.fetch(PAGE_URL)
+        second = await crawler.fetch(PAGE_URL)
+
+    assert len(site.requests) == 1
+    assert second.text == first.text
+    assert second.request.url == PAGE_URL
+    assert cache.stats.as_dict() == {
+        "hits": 1,
+        "revalidated": 0,
+        "misses": 1,
+        "evictions": 0,
+        "hit_rate": 0.5,
+    }
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_revalidated(tmp_path) -> None:
+    site = VersionedSite()
+    cache = HttpCache(str(tmp_path / "cache.db"), ttl=0)
+
+    async with Crawler(transport=httpx.MockTransport(site), cache=cache) as crawler:
+        await crawler.fetch(PAGE_URL)
+        not_modified = await crawler.fetch(PAGE_URL)
+        site.version = 2
+        modified = await crawler.fetch(PAGE_URL)
+
+    assert site.requests[1].headers["If-None-Match"] == '"v1"'
+    assert not_modified.status_code == 200
+    assert not_modified.text.endswith("v1")
+    assert modified.text.endswith("v2")
+    assert cache.stats.revalidated == 1
+    assert cache.stats.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_evicted(tmp_path) -> None:
+    site = VersionedSite()
+    page_size = len("/page-1.html v1")
+    cache = HttpCache(str(tmp_path / "cache.db"), max_size=page_size * 2)
+    urls = [f"https://books.toscrape.com/page-{n}.html" for n in range(1, 4)]
+
+    async with Crawler(transport=httpx.MockTransport(site), cache=cache) as crawler:
+        await crawler.fetch(urls[0])
+        await crawler.fetch(urls[1])
+        # після звернення перша сторінка стає останньою використаною
+        await crawler.fetch(urls[0])
+        await crawler.fetch(urls[2])
+
+    assert cache.stats.evictions == 1
+    assert await cache.get(urls[0]) is not None
+    assert await cache.get(urls[1]) is None
+    assert await cache.get(urls[2]) is not None
@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+import pytest
+from crawler import Crawler, RequestBudget
+from incremental import CrawlStore, IncrementalCrawler
+
+MYSTERY_URL = "https://books.toscrape.com/catalogue/category/books/mystery_3/index.html"
+
+
+class ChangingSite:
+    """Збережені сторінки, в яких можна підмінити частину вмісту між обходами."""
+
+    def __init__(self, handler) -> None:
+        self.handler = handler
+        self.replacements: dict[str, str] = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        response = self.handler(request)
+        text = response.text
+        for old, new in self.replacements.items():
+            text = text.replace(old, new)
+        return httpx.Response(response.status_code, text=text)
+
+
+@pytest.mark.asyncio
+async def test_incremental_crawl_returns_only_changes(
+    tmp_path, saved_page_handler
+) -> None:
+    site = ChangingSite(saved_page_handler)
+    store = CrawlStore(str(tmp_path / "crawl_store.db"))
+
+    async def crawl() -> tuple:
+        incremental = IncrementalCrawler(
+            crawler, parse_pool, store, RequestBudget(limit=10)
+        )
+        return await incremental.crawl([MYSTERY_URL]), incremental.stats
+
+    with ProcessPoolExecutor(max_workers=1) as parse_pool:
+        async with Crawler(transport=httpx.MockTransport(site)) as crawler:
+            first_diff, first_stats = await crawl()
+            unchanged_diff, unchanged_stats = await crawl()
+
+            site.replacements = {
+                "£47.82": "£40.00",
+                'title="Gone Girl"': 'title="Gone Girl (Special Edition)"',
+            }
+            changed_diff, changed_stats = await crawl()
+
+    assert len(first_diff.added) == 32
+    assert first_stats.pages_parsed == 2
+
+    assert (
+        unchanged_diff.added == unchanged_diff.removed == unchanged_diff.changed == []
+    )
+    assert unchanged_stats.pages_parsed == 0
+    assert unchanged_stats.pages_skipped == 2
+
+    assert changed_stats.pages_parsed == 2
+    assert changed_diff.changed == [
+        {
+            "category": "Mystery",
+            "title": "Sharp Objects",
+            "changes": {"price": ["£47.82", "£40.00"]},
+        }
+    ]
+    assert [book["title"] for book in changed_diff.added] == [
+        "Gone Girl (Special Edition)"
+    ]
+    assert [book["title"] for book in changed_diff.removed] == ["Gone Girl"]
@@ -0,0 +1,133 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from schema import (
+    USERS_FTS_REBUILD,
+    USERS_FTS_TABLE,
+    USERS_FTS_TRIGGERS,
+    USERS_TABLE,
+    fts_phrase,
+)
+
+# кількість користувачів у тестовій БД
+NUMBER_OF_USERS = 1_000_000
+# скільки разів виконується кожен запит
+REPEATS = 5
+LIMIT = 100
+
+FIRST_NAMES = [
+    "John", "Karen", "Joseph", "Julie", "Spencer", "Donald", "Erik", "Jared",
+    "Maria", "Anna", "Olena", "Taras", "Gerald", "Linda", "Robert", "Sophia",
+]  # fmt: skip
+LAST_NAMES = [
+    "Hill", "Moore", "Miller", "Singleton", "Rodriguez", "Hopkins", "Valentine",
+    "Dawson", "Anderson", "Thompson", "Shevchenko", "Kovalenko", "Bondarenko",
+]  # fmt: skip
+DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "example.org"]
+
+# (опис, значення для пошуку в імені)
+QUERIES = [
+    ("часте ім'я", "John"),
+    ("частина прізвища", "enko"),
+    ("рідкісне поєднання", "Taras Hill"),
+    ("немає збігів", "Zzyzx"),
+]
+
+
+def create_database(path: str) -> None:
+    """Заповнює БД випадковими користувачами і будує повнотекстовий індекс."""
+    random.seed(1)
+    with sqlite3.connect(path) as connection:
+        connection.execute(USERS_TABLE)
+        connection.executemany(
+            "INSERT INTO users (id, name, email, phone, age) VALUES (?, ?, ?, ?, ?);",
+            (
+                (
+                    n,
+                    f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}",
+                    f"user{n}@{random.choice(DOMAINS)}",
+                    "+1-234-567-8901",
+                    random.randint(18, 100),
+                )
+                for n in range(1, NUMBER_OF_USERS + 1)
+            ),
+        )
+        # індекс будується один раз після вставки, як і при імпорті з csv
+        connection.execute(USERS_FTS_TABLE)
+        connection.execute(USERS_FTS_REBUILD)
+        for trigger in USERS_FTS_TRIGGERS:
+            connection.execute(trigger)
+
+
+def measure(
+    connection: sqlite3.Connection, query: str, params: tuple
+) -> tuple[list, float]:
+    """Результат запиту і середній час його виконання разом з отриманням усіх рядків."""
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        rows = connection.execute(query, params).fetchall()
+    return rows, (time.perf_counter() - start) / REPEATS
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench_search.db")
+
+        start = time.perf_counter()
+        create_database(path)
+        print(
+            f"Користувачів: {NUMBER_OF_USERS}, "
+            f"БД створена за {time.perf_counter() - start:.1f} с."
+        )
+
+        connection = sqlite3.connect(path)
+        for description, name in QUERIES:
+            like_params = (f"%{name}%",)
+            fts_params = (fts_phrase("name", name),)
+
+            _, like_time = measure(
+                connection,
+                "SELECT * FROM users WHERE name LIKE ? LIMIT ?;",
+                (*like_params, LIMIT),
+            )
+            _, fts_time = measure(
+                connection,
+                """
+                SELECT users.* FROM users_fts JOIN users ON users.id = users_fts.rowid
+                WHERE users_fts MATCH ? LIMIT ?;
+                """,
+                (*fts_params, LIMIT),
+            )
+            # для сортування за релевантністю bm25 рахується для кожного збігу
+            _, fts_ranked_time = measure(
+                connection,
+                """
+                SELECT users.* FROM users_fts JOIN users ON users.id = users_fts.rowid
+                WHERE users_fts MATCH ? ORDER BY users_fts.rank LIMIT ?;
+                """,
+                (*fts_params, LIMIT),
+            )
+            _, like_count_time = measure(
+                connection, "SELECT count(*) FROM users WHERE name LIKE ?;", like_params
+            )
+            fts_count, fts_count_time = measure(
+                connection,
+                "SELECT count(*) FROM users_fts WHERE users_fts MATCH ?;",
+                fts_params,
+            )
+            print(
+                f"{description} ({name!r}, збігів: {fts_count[0][0]}):\n"
+                f"  LIMIT {LIMIT}: LIKE {like_time * 1000:.1f} мс, "
+                f"FTS5 {fts_time * 1000:.1f} мс, "
+                f"FTS5 за релевантністю {fts_ranked_time * 1000:.1f} мс\n"
+                f"  всі збіги: LIKE {like_count_time * 1000:.1f} мс, "
+                f"FTS5 {fts_count_time * 1000:.1f} мс"
+            )
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
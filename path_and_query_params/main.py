@@ -1,32 +1,71 @@
+import asyncio
 import json
+import os
+from dataclasses import asdict
 
 import aiosqlite
-from fastapi import FastAPI, Header, HTTPException, Path, Query, Request
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
+from queries import (
+    SELECT_USER_BY_ID,
+    SELECT_USERS_AFTER_ID,
+    SELECT_USERS_PAGE,
+    explain_hot_queries,
+    search_users_query,
+)
+from schema import SCHEMA, USERS_FTS_REBUILD
+
+from FastAPI.common.content_encoding import CompressionMiddleware
+from FastAPI.common.etag import NO_CACHE, ETagMiddleware, not_modified, row_etag
+from FastAPI.common.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_after_id
+from FastAPI.common.responses import FastJSONResponse
+from FastAPI.common.sqlite_pool import SQLitePool
 
 DATABASE_URL = "./mydb.db"
+# службові ендпоінти (/dev/...) доступні тільки при USERS_API_DEV=1
+DEV_MODE = os.environ.get("USERS_API_DEV") == "1"
 
 # pip install aiosqlite
 
+# довгоживучі з'єднання з БД, які відкриваються при старті сервера
+pool = SQLitePool(DATABASE_URL)
+
 
 async def init_database() -> None:
     """Створення таблиць в БД при запуску сервера."""
-    async with aiosqlite.connect(DATABASE_URL) as connection:
+    async with pool.writer() as connection:
         cursor = await connection.cursor()
-        await cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                name VARCHAR(50) NOT NULL,
-                phone VARCHAR(50) NOT NULL,
-                email VARCHAR(50) NOT NULL,
-                age INTEGER NOT NULL
-        );
-        """
-        )
+        await cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'users_fts';")
+        fts_exists = await cursor.fetchone() is not None
+
+        for statement in SCHEMA:
+            await cursor.execute(statement)
+        if not fts_exists:
+            # повнотекстовий індекс для користувачів, доданих до його створення
+            await cursor.execute(USERS_FTS_REBUILD)
         await connection.commit()
 
 
-app = FastAPI(title="Users API", on_startup=(init_database,))
+app = FastAPI(
+    title="Users API",
+    on_startup=(pool.open, init_database),
+    on_shutdown=(pool.close,),
+)
+# ETag для всіх GET відповідей: клієнт, який опитує список, отримує 304 без тіла
+app.add_middleware(
+    ETagMiddleware,
+    cache_control={"/users/": NO_CACHE, "/users/{user_id}": "private, max-age=5"},
+)
+# списки користувачів і результати пошуку - JSON на десятки-сотні Кб
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
 
 # http://127.0.0.1:8000/users/?skip=5&limit=20.
@@ -35,6 +74,8 @@ app = FastAPI(title="Users API", on_startup=(init_database,))
 # {"id":7,"name":"Donald Hopkins","phone":"+1-890-123-4567","email":"mcintyrechristopher@hotmail.com","age":45}
 # ...
 # ]
+# http://127.0.0.1:8000/users/?after_id=0&limit=20
+# наступна сторінка: http://127.0.0.1:8000/users/?cursor=<X-Next-Cursor>&limit=20
 @app.get("/users/")
 async def get_users(
     request: Request,
@@ -48,18 +89,30 @@ async def get_users(
         title="Ліміт",
         description="Максимальна кількість записів для видачі.",
     ),
+    after_id: int | None = Depends(keyset_after_id),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ):
-    """Отримання всіх користувачів в діапазоні `skip` та `limit`."""
+    """
+    Отримання всіх користувачів в діапазоні `skip` та `limit`.
+    З `after_id` або `cursor` сторінки вибираються за ключем (ID), і час запиту
+    не залежить від того, наскільки далеко сторінка від початку, а курсор
+    наступної сторінки повертається в заголовку `X-Next-Cursor`.
+    """
     print(f"Параметри запиту: {request.query_params}")
 
-    async with aiosqlite.connect(DATABASE_URL) as connection:
-        # повертає записи з БД у вигляді словника
-        connection.row_factory = aiosqlite.Row
-        cursor = await connection.cursor()
-        await cursor.execute("SELECT * FROM users LIMIT ? OFFSET ?;", (limit, skip))
+    async with connection.cursor() as cursor:
+        if after_id is not None:
+            await cursor.execute(SELECT_USERS_AFTER_ID, (after_id, limit))
+        else:
+            await cursor.execute(SELECT_USERS_PAGE, (limit, skip))
         users = await cursor.fetchall()
 
-    return users
+    headers = {}
+    if after_id is not None and users and len(users) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(users[-1]["id"])
+
+    # рядки БД кодуються в JSON напряму, без jsonable_encoder
+    return FastJSONResponse(users, headers=headers)
 
 
 # http://127.0.0.1:8000/users/search/?name=John&age=37
@@ -72,6 +125,11 @@ async def search_users(
         title="Пошук по імені",
         description="Запит для пошуку користувачів по імені.",
     ),
+    email: str | None = Query(
+        None,
+        title="Пошук по email",
+        description="Запит для пошуку користувачів по частині email.",
+    ),
     age: int | None = Query(
         None,
         title="Пошук по віку",
@@ -79,25 +137,36 @@ async def search_users(
         gt=29,
         description="Запит для пошуку користувачів по віку.",
     ),
+    limit: int = Query(
+        100,
+        title="Ліміт",
+        gt=0,
+        le=1000,
+        description="Максимальна кількість записів для видачі.",
+    ),
+    ranked: bool = Query(
+        True,
+        title="Сортування за релевантністю",
+        description=(
+            "Сортувати результати за релевантністю (bm25). Для запитів з дуже великою "
+            "кількістю збігів без сортування відповідь швидша."
+        ),
+    ),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ):
-    """Пошук користувачів по імені та віку."""
+    """
+    Пошук користувачів по частині імені, email та віку.
+    Пошук по тексту виконується через повнотекстовий індекс `users_fts`.
+    """
     print(f"Параметри запиту: {request.query_params}")
 
-    async with aiosqlite.connect(DATABASE_URL) as connection:
-        # повертає записи з БД у вигляді словника
-        connection.row_factory = aiosqlite.Row
-        cursor = await connection.cursor()
-        if age is not None:
-            await cursor.execute(
-                "SELECT * FROM users WHERE name LIKE ? AND age = ?;", (f"%{name}%", age)
-            )
-        else:
-            await cursor.execute(
-                "SELECT * FROM users WHERE name LIKE ?", (f"%{name}%",)
-            )
+    query, params = search_users_query(name, email, age, limit=limit, ranked=ranked)
+
+    async with connection.cursor() as cursor:
+        await cursor.execute(query, params)
         users = await cursor.fetchall()
 
-    return users
+    return FastJSONResponse(users)
 
 
 # http://127.0.0.1:8000/users/52
@@ -105,19 +174,48 @@ async def search_users(
 @app.get("/users/{user_id}")
 async def get_user(
     request: Request,
+    response: Response,
     user_id: int = Path(gt=0, description="ID користувача."),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ):
-    """Отримання користувача по ID."""
+    """Отримання користувача по ID. Якщо користувач не змінився, відповідь 304."""
     print(f"Параметри шляху: {request.path_params}")
 
-    async with aiosqlite.connect(DATABASE_URL) as connection:
-        # повертає записи з БД у вигляді словника
-        connection.row_factory = aiosqlite.Row
-        cursor = await connection.cursor()
-        await cursor.execute("SELECT * FROM users WHERE id = ?;", (user_id,))
+    async with connection.cursor() as cursor:
+        await cursor.execute(SELECT_USER_BY_ID, (user_id,))
 
         user = await cursor.fetchone()
         if user is None:
             raise HTTPException(404, "User does not exist.")
 
+    # ETag з полів рядка: при збігу відповідь не серіалізується
+    etag = row_etag(*user)
+    if not_modified_response := not_modified(request, etag):
+        return not_modified_response
+    response.headers["ETag"] = etag
     return user
+
+
+def dev_only() -> None:
+    """Службові ендпоінти поза режимом розробки відповідають так, ніби їх немає."""
+    if not DEV_MODE:
+        raise HTTPException(404, "Not Found")
+
+
+# USERS_API_DEV=1 uvicorn main:app --reload
+# http://127.0.0.1:8000/dev/query-plans
+@app.get(
+    "/dev/query-plans",
+    dependencies=[Depends(dev_only)],
+    include_in_schema=DEV_MODE,
+)
+async def get_query_plans():
+    """
+    Плани виконання (`EXPLAIN QUERY PLAN`) запитів з `queries.py`
+    і перевірка, що жоден з них не перебирає всю таблицю без індексу.
+    """
+    plans = await asyncio.to_thread(explain_hot_queries, DATABASE_URL)
+    return {
+        "ok": all(plan.ok for plan in plans),
+        "queries": [{**asdict(plan), "ok": plan.ok} for plan in plans],
+    }
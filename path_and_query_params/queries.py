@@ -0,0 +1,161 @@
+import argparse
+import sqlite3
+import sys
+from dataclasses import dataclass
+
+from schema import FTS_MIN_QUERY_LENGTH, fts_phrase
+
+# Запити ендпоінтів до таблиці `users`. Вони зібрані в одному місці, щоб
+# `EXPLAIN QUERY PLAN` перевіряв саме ті запити, які виконує сервер.
+
+SELECT_USERS_PAGE = "SELECT * FROM users LIMIT ? OFFSET ?;"
+SELECT_USERS_AFTER_ID = "SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?;"
+SELECT_USER_BY_ID = "SELECT * FROM users WHERE id = ?;"
+
+
+def search_users_query(
+    name: str,
+    email: str | None = None,
+    age: int | None = None,
+    *,
+    limit: int = 100,
+    ranked: bool = True,
+) -> tuple[str, tuple[str | int, ...]]:
+    """
+    Запит пошуку користувачів і його параметри. Текст шукається через
+    повнотекстовий індекс `users_fts`, а занадто короткий для нього текст - через `LIKE`.
+    """
+    match_terms = []
+    conditions = []
+    params: list[str | int] = []
+    for column, value in (("name", name), ("email", email)):
+        if value is None:
+            continue
+        if len(value) >= FTS_MIN_QUERY_LENGTH:
+            match_terms.append(fts_phrase(column, value))
+        else:
+            # занадто короткий запит для індексу, тому перевіряється кожен рядок
+            conditions.append(f"users.{column} LIKE ?")
+            params.append(f"%{value}%")
+    if age is not None:
+        conditions.append("users.age = ?")
+        params.append(age)
+
+    if match_terms:
+        query = "SELECT users.* FROM users_fts JOIN users ON users.id = users_fts.rowid"
+        conditions.insert(0, "users_fts MATCH ?")
+        params.insert(0, " AND ".join(match_terms))
+        # релевантність рахується для кожного збігу, а не тільки для `limit` записів
+        order_by = " ORDER BY users_fts.rank" if ranked else ""
+    else:
+        query = "SELECT users.* FROM users"
+        order_by = ""
+    query += " WHERE " + " AND ".join(conditions) + order_by + " LIMIT ?;"
+
+    return query, (*params, limit)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """Запит, план виконання якого перевіряється: назва, SQL і приклад параметрів."""
+
+    name: str
+    sql: str
+    params: tuple[str | int, ...]
+    # повний перебір таблиці очікуваний і не вважається помилкою
+    allow_full_scan: bool = False
+
+
+@dataclass
+class QueryPlan:
+    """Результат `EXPLAIN QUERY PLAN` для одного запиту."""
+
+    name: str
+    sql: str
+    plan: list[str]
+    full_scans: list[str]
+    allow_full_scan: bool
+
+    @property
+    def ok(self) -> bool:
+        return self.allow_full_scan or not self.full_scans
+
+
+HOT_QUERIES = (
+    HotQuery(
+        "get_users",
+        SELECT_USERS_PAGE,
+        (100, 0),
+        # OFFSET завжди читає всі пропущені рядки, тому для глибоких сторінок
+        # використовується пагінація за ключем (get_users_after_id)
+        allow_full_scan=True,
+    ),
+    HotQuery("get_users_after_id", SELECT_USERS_AFTER_ID, (0, 100)),
+    HotQuery("get_user", SELECT_USER_BY_ID, (1,)),
+    HotQuery("search_users", *search_users_query("John")),
+    HotQuery("search_users_age", *search_users_query("John", age=37)),
+    HotQuery("search_users_email", *search_users_query("John", email="hotmail")),
+    HotQuery("search_users_short_name_age", *search_users_query("Jo", age=37)),
+    HotQuery(
+        "search_users_short_name",
+        *search_users_query("Jo"),
+        # частину імені з 1-2 символів не можна знайти ні в якому індексі
+        allow_full_scan=True,
+    ),
+)
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """
+    Кроки плану з повним перебором таблиці: `SCAN <таблиця>` без індексу.
+    Перебір через індекс (USING INDEX) і пошук у віртуальній таблиці FTS5 - не повний.
+    """
+    return [
+        step
+        for step in plan
+        if step.startswith("SCAN ")
+        and "USING " not in step
+        and "VIRTUAL TABLE" not in step
+    ]
+
+
+def explain(connection: sqlite3.Connection, query: HotQuery) -> QueryPlan:
+    """Виконує `EXPLAIN QUERY PLAN` для запиту."""
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {query.sql}", query.params)
+    # кожен рядок: (id, parent, notused, detail)
+    plan = [detail for *_, detail in rows]
+    return QueryPlan(
+        query.name, query.sql, plan, full_scans(plan), query.allow_full_scan
+    )
+
+
+def explain_hot_queries(db_name: str) -> list[QueryPlan]:
+    """Плани виконання всіх зареєстрованих запитів."""
+    connection = sqlite3.connect(db_name)
+    try:
+        return [explain(connection, query) for query in HOT_QUERIES]
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Перевірка планів виконання запитів до таблиці users."
+    )
+    parser.add_argument("db_name", nargs="?", default="./mydb.db")
+    args = parser.parse_args()
+
+    plans = explain_hot_queries(args.db_name)
+    for query_plan in plans:
+        if not query_plan.ok:
+            status = "FULL SCAN"
+        elif query_plan.full_scans:
+            status = "OK, очікуваний FULL SCAN"
+        else:
+            status = "OK"
+        print(f"[{status}] {query_plan.name}: {query_plan.sql}")
+        for step in query_plan.plan:
+            print(f"    {step}")
+
+    # ненульовий код виходу, щоб перевірку можна було запускати в CI
+    sys.exit(0 if all(query_plan.ok for query_plan in plans) else 1)
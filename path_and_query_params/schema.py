@@ -0,0 +1,86 @@
+# Схема БД користувачів, спільна для сервера (`main.py`) та імпорту (`sqlite_import.py`).
+from dataclasses import dataclass
+
+USERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        name VARCHAR(50) NOT NULL,
+        phone VARCHAR(50) NOT NULL,
+        email VARCHAR(50) NOT NULL,
+        age INTEGER NOT NULL
+    );
+"""
+
+
+@dataclass(frozen=True)
+class Index:
+    """Вторинний індекс таблиці, який створюється разом з нею."""
+
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    unique: bool = False
+
+    def create_sql(self) -> str:
+        unique = "UNIQUE " if self.unique else ""
+        columns = ", ".join(self.columns)
+        return f"CREATE {unique}INDEX IF NOT EXISTS {self.name} ON {self.table} ({columns});"
+
+
+# Індекси для запитів з `queries.py` (перевірка: `python queries.py`).
+USERS_INDEXES = (
+    # пошук за віком: для короткої частини імені `LIKE` перевіряється по значеннях
+    # з індексу, без читання рядків таблиці, які не підходять за віком
+    Index("ix_users_age_name", "users", ("age", "name")),
+)
+
+# Повнотекстовий індекс (FTS5) по іменах та email. Токенайзер `trigram` розбиває текст
+# на послідовності з трьох символів, тому індекс знаходить будь-яку частину слова,
+# як і `LIKE '%...%'`, але без перебору всієї таблиці.
+# Індекс не зберігає копію даних (content='users'), а синхронізується тригерами.
+USERS_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        name, email, content='users', content_rowid='id', tokenize='trigram'
+    );
+"""
+
+USERS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE ON users BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email)
+        VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+    END;
+    """,
+)
+
+# перебудовує індекс з поточних даних таблиці `users`
+USERS_FTS_REBUILD = "INSERT INTO users_fts (users_fts) VALUES ('rebuild');"
+
+# trigram не може знайти рядок, коротший за три символи
+FTS_MIN_QUERY_LENGTH = 3
+
+SCHEMA = (
+    USERS_TABLE,
+    *(index.create_sql() for index in USERS_INDEXES),
+    USERS_FTS_TABLE,
+    *USERS_FTS_TRIGGERS,
+)
+
+
+def fts_phrase(column: str, text: str) -> str:
+    """Запит FTS5 для пошуку `text` як частини значення колонки `column`."""
+    # текст береться в лапки, щоб символи синтаксису FTS5 (-, :, *) шукались як є
+    escaped = text.replace('"', '""')
+    return f'{column} : "{escaped}"'
@@ -1,39 +1,353 @@
+import argparse
 import csv
+import itertools
+import json
 import os
+import pathlib
 import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
 
+from schema import SCHEMA, USERS_FTS_REBUILD, USERS_INDEXES
 
-def main(file_name: str, db_name: str) -> None:
+# кількість рядків в одній транзакції
+BATCH_SIZE = 10_000
+# як часто (в партіях) виводити прогрес імпорту
+PROGRESS_EVERY = 10
+# скільки помилок перевірки зберігається для звіту
+MAX_REPORTED_ERRORS = 20
+
+CSV_HEADER = ["id", "name", "email", "phone", "age"]
+
+# (id, name, email, phone, age)
+UserRow = tuple[int, str, str, str, int]
+
+
+class InvalidRow(ValueError):
+    """Рядок `csv` не проходить перевірку і не імпортується."""
+
+
+@dataclass
+class ImportResult:
+    """Результат імпорту: додані і пропущені рядки, перші помилки перевірки."""
+
+    inserted: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def create_tables(connection: sqlite3.Connection) -> None:
+    """Схема користувачів (як на сервері) і таблиця з прогресом імпорту кожного файлу."""
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            file_path TEXT PRIMARY KEY,
+            rows_done INTEGER NOT NULL
+        );
+        """
+    )
+
+
+def get_checkpoint(connection: sqlite3.Connection, file_path: str) -> int:
+    """Скільки рядків файлу вже оброблено попередніми запусками імпорту."""
+    row = connection.execute(
+        "SELECT rows_done FROM import_checkpoints WHERE file_path = ?;", (file_path,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def drop_indexes(connection: sqlite3.Connection) -> list[str]:
+    """
+    Видаляє вторинні індекси і тригери (синхронізація повнотекстового індексу)
+    таблиці `users` і повертає їх SQL для створення заново.
+    Оновлювати індекси на кожну вставку повільніше, ніж побудувати їх один раз після імпорту.
+    """
+    objects = connection.execute(
+        """
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND tbl_name = 'users' AND sql IS NOT NULL;
+        """
+    ).fetchall()
+    for object_type, name, _ in objects:
+        connection.execute(f'DROP {object_type.upper()} "{name}";')
+    return [sql for _, _, sql in objects]
+
+
+def validate_row(row: list[str]) -> UserRow:
+    """Перевіряє і перетворює рядок `csv` у значення для вставки."""
+    if len(row) != len(CSV_HEADER):
+        raise InvalidRow(f"expected {len(CSV_HEADER)} columns, got {len(row)}")
+
+    user_id, name, email, phone, age = (value.strip() for value in row)
+    try:
+        user_id, age = int(user_id), int(age)
+    except ValueError:
+        raise InvalidRow("id and age must be integers") from None
+
+    if user_id <= 0:
+        raise InvalidRow("id must be positive")
+    if not 0 < age <= 150:
+        raise InvalidRow("age is out of range")
+    if not name or "@" not in email or not phone:
+        raise InvalidRow("name, email and phone are required")
+    if max(len(name), len(email), len(phone)) > 50:
+        raise InvalidRow("name, email and phone must be at most 50 characters")
+
+    return user_id, name, email, phone, age
+
+
+def skip_row(result: ImportResult, line_number: int, error: str) -> None:
+    """Рахує пропущений рядок і зберігає помилку для звіту."""
+    result.skipped += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(f"Рядок {line_number}: {error}")
+
+
+def validate_rows(
+    rows: Iterable[tuple[int, list[str]]], result: ImportResult
+) -> Iterator[tuple[int, UserRow | None]]:
+    """
+    Етап конвеєра з перевіркою рядків. Номер рядка передається далі і для
+    невалідних рядків (з `None`), щоб контрольна точка враховувала всі прочитані рядки.
+    """
+    for line_number, row in rows:
+        try:
+            yield line_number, validate_row(row)
+        except InvalidRow as e:
+            skip_row(result, line_number, str(e))
+            yield line_number, None
+
+
+def batched(
+    rows: Iterable[tuple[int, UserRow | None]], size: int
+) -> Iterator[tuple[int, list[tuple[int, UserRow]]]]:
+    """
+    Етап конвеєра, який збирає рядки у партії:
+    (номер останнього рядка, валідні рядки разом з їх номерами).
+    """
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch[-1][0], [(number, row) for number, row in batch if row is not None]
+
+
+def reject_duplicate_ids(
+    connection: sqlite3.Connection,
+    rows: list[tuple[int, UserRow]],
+    result: ImportResult,
+) -> list[UserRow]:
+    """
+    Пропускає рядки з `id`, який вже є в БД або раніше в цій партії, як невалідні,
+    щоб один повтор не зупиняв весь імпорт помилкою первинного ключа.
+    """
+    # всі id партії передаються одним параметром (JSON масив), а не параметром
+    # на кожен id: кількість параметрів запиту в SQLite обмежена
+    existing = {
+        user_id
+        for (user_id,) in connection.execute(
+            "SELECT id FROM users WHERE id IN (SELECT value FROM json_each(?));",
+            (json.dumps([row[0] for _, row in rows]),),
+        )
+    }
+    unique = []
+    for line_number, row in rows:
+        if row[0] in existing:
+            skip_row(result, line_number, f"id {row[0]} already exists")
+            continue
+        existing.add(row[0])
+        unique.append(row)
+    return unique
+
+
+def restore_indexes(connection: sqlite3.Connection, indexes: list[str]) -> None:
+    """
+    Створює видалені індекси і тригери та перебудовує повнотекстовий індекс
+    в окремій транзакції. Незавершена транзакція імпорту (помилка або Ctrl-C посеред
+    партії) спочатку відкочується, інакше індекси відкотились би разом з нею.
+    """
+    if connection.in_transaction:
+        connection.execute("ROLLBACK;")
+    connection.execute("BEGIN;")
+    # індекси будуються один раз після завантаження всіх рядків
+    for sql in indexes:
+        connection.execute(sql)
+    connection.execute(USERS_FTS_REBUILD)
+    connection.execute("COMMIT;")
+
+
+def import_users(
+    connection: sqlite3.Connection,
+    file_path: str,
+    *,
+    batch_size: int = BATCH_SIZE,
+) -> ImportResult:
+    """
+    Імпортує користувачів з файлу партіями, кожна у власній транзакції разом з
+    контрольною точкою, тому перерваний імпорт продовжується з останньої
+    збереженої партії.
+    """
+    rows_done = get_checkpoint(connection, file_path)
+    result = ImportResult()
+
+    with open(file_path, encoding="utf-8", newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header != CSV_HEADER:
+            raise ValueError(f"Unexpected csv header: {header}, expected {CSV_HEADER}.")
+
+        # номер рядка даних (без заголовка), починаючи з 1
+        rows = enumerate(reader, start=1)
+        if rows_done:
+            print(f"Продовження імпорту після рядка {rows_done}.")
+            rows = itertools.islice(rows, rows_done, None)
+
+        start = time.perf_counter()
+        for number, (last_line, batch) in enumerate(
+            batched(validate_rows(rows, result), batch_size), start=1
+        ):
+            connection.execute("BEGIN;")
+            batch = reject_duplicate_ids(connection, batch, result)
+            connection.executemany(
+                "INSERT INTO users (id, name, email, phone, age) VALUES(?, ?, ?, ?, ?);",
+                batch,
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO import_checkpoints VALUES (?, ?);",
+                (file_path, last_line),
+            )
+            connection.execute("COMMIT;")
+            result.inserted += len(batch)
+
+            if number % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                print(
+                    f"Імпортовано {result.inserted} рядків, "
+                    f"{result.inserted / elapsed:.0f} рядків/с."
+                )
+
+    return result
+
+
+def main(file_name: str, db_name: str, *, batch_size: int = BATCH_SIZE) -> None:
     """Функція для імпорту даних із `csv` в `sqlite` базу даних."""
     current_dir = os.path.dirname(os.path.abspath(__file__))
     file_path = os.path.join(current_dir, file_name)
 
-    with sqlite3.connect(db_name, autocommit=True) as connection:
-        cursor = connection.cursor()
-
-        create_table_query = """
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY,
-                    name VARCHAR(50) NOT NULL,
-                    phone VARCHAR(50) NOT NULL,
-                    email VARCHAR(50) NOT NULL,
-                    age INTEGER NOT NULL
-            );
-            """
+    # транзакції відкриваються і завершуються явно (BEGIN/COMMIT) для кожної партії
+    connection = sqlite3.connect(db_name, isolation_level=None)
+    try:
+        # WAL не блокує читання сервером під час імпорту, а без синхронізації з диском
+        # (synchronous=OFF) запис швидший, але при збої ОС база може пошкодитись,
+        # тому synchronous=OFF встановлюється тільки для з'єднання імпорту
+        connection.execute("PRAGMA journal_mode=WAL;")
+        connection.execute("PRAGMA synchronous=OFF;")
+        create_tables(connection)
+
+        indexes = drop_indexes(connection)
+        start = time.perf_counter()
+        try:
+            result = import_users(connection, file_path, batch_size=batch_size)
+        finally:
+            restore_indexes(connection, indexes)
+        elapsed = time.perf_counter() - start
+    finally:
+        connection.close()
 
-        cursor.execute(create_table_query)
-        with open(file_path, encoding="utf-8") as file:
-            contents = csv.reader(file)
-            # пропускаємо заголовок
-            next(contents)
+    for error in result.errors:
+        print(error)
+    print(
+        f"Імпортовано {result.inserted} рядків за {elapsed:.2f} с "
+        f"({result.inserted / elapsed:.0f} рядків/с), "
+        f"пропущено невалідних: {result.skipped}."
+    )
 
-            insert_records = (
-                "INSERT INTO users (id, name, email, phone, age) VALUES(?, ?, ?, ?, ?);"
+
+def write_users_csv(path: pathlib.Path, ids: Iterable[int]) -> None:
+    """Файл `csv` з користувачами з переданими `id` (для тестів)."""
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        for user_id in ids:
+            writer.writerow(
+                [user_id, f"User {user_id}", f"user{user_id}@example.com", "+1", 30]
             )
 
-            cursor.executemany(insert_records, contents)
-            connection.commit()
+
+def users_state(db_name: str) -> tuple[int, int, int, int]:
+    """Кількість користувачів, рядків повнотекстового індексу, індексів і тригерів."""
+    with sqlite3.connect(db_name) as connection:
+        users = connection.execute("SELECT count(*) FROM users;").fetchone()[0]
+        # запит до FTS, а не до `users`: content-таблиця віддала б рядки `users`
+        fts = connection.execute(
+            "SELECT count(*) FROM users_fts WHERE users_fts MATCH 'example';"
+        ).fetchone()[0]
+        indexes, triggers = connection.execute(
+            """
+            SELECT count(*) FILTER (WHERE type = 'index'),
+                   count(*) FILTER (WHERE type = 'trigger')
+            FROM sqlite_master WHERE tbl_name = 'users' AND sql IS NOT NULL;
+            """
+        ).fetchone()
+    return users, fts, indexes, triggers
+
+
+def test_import_skips_duplicate_ids(tmp_path: pathlib.Path, capsys) -> None:
+    """Повторні `id` (в БД і в самому файлі) пропускаються як невалідні рядки."""
+    db_name = str(tmp_path / "users.db")
+    write_users_csv(tmp_path / "first.csv", range(1, 11))
+    write_users_csv(tmp_path / "second.csv", [5, 11, 12, 11])
+
+    main(str(tmp_path / "first.csv"), db_name, batch_size=4)
+    main(str(tmp_path / "second.csv"), db_name, batch_size=4)
+
+    assert users_state(db_name) == (12, 12, len(USERS_INDEXES), 3)
+    output = capsys.readouterr().out
+    assert "Рядок 1: id 5 already exists" in output
+    assert "Рядок 4: id 11 already exists" in output
+
+
+def test_failed_import_restores_indexes(tmp_path: pathlib.Path) -> None:
+    """
+    Після помилки посеред партії індекси, тригери і повнотекстовий індекс
+    відновлюються, а повторний запуск продовжує імпорт з контрольної точки.
+    """
+    db_name = str(tmp_path / "users.db")
+    file_name = str(tmp_path / "users.csv")
+    write_users_csv(tmp_path / "users.csv", range(1, 31))
+    with sqlite3.connect(db_name) as connection:
+        create_tables(connection)
+        # помилка при збереженні контрольної точки третьої партії - вже після
+        # вставки її рядків у відкритій транзакції
+        connection.execute(
+            """
+            CREATE TRIGGER fail_import BEFORE INSERT ON import_checkpoints
+            WHEN new.rows_done = 30 BEGIN SELECT RAISE(ABORT, 'interrupted'); END;
+            """
+        )
+
+    try:
+        main(file_name, db_name, batch_size=10)
+    except sqlite3.IntegrityError:
+        pass
+    else:
+        raise AssertionError("import is expected to fail")
+
+    assert users_state(db_name) == (20, 20, len(USERS_INDEXES), 3)
+
+    with sqlite3.connect(db_name) as connection:
+        connection.execute("DROP TRIGGER fail_import;")
+    main(file_name, db_name, batch_size=10)
+
+    assert users_state(db_name) == (30, 30, len(USERS_INDEXES), 3)
 
 
 if __name__ == "__main__":
-    main("fake_users.csv", "./mydb.db")
+    parser = argparse.ArgumentParser(description="Імпорт користувачів із csv в sqlite.")
+    parser.add_argument("file_name", nargs="?", default="fake_users.csv")
+    parser.add_argument("db_name", nargs="?", default="./mydb.db")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    main(args.file_name, args.db_name, batch_size=args.batch_size)
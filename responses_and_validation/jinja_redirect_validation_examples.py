@@ -8,6 +8,11 @@ from fastapi.templating import Jinja2Templates
 from models import DepartmentInfo, EmployeeCreate, EmployeeInfo
 from starlette.templating import _TemplateResponse
 
+from FastAPI.common.content_encoding import CompressionMiddleware
+from FastAPI.common.etag import NO_CACHE, ETagMiddleware
+from FastAPI.common.responses import FastJSONResponse
+from FastAPI.common.sqlite_pool import SQLitePool, create_unique_index
+
 # задання назви директорії для HTML сторінок
 templates = Jinja2Templates(directory="templates")
 
@@ -24,17 +29,13 @@ logger = logging.getLogger(__name__)
 SQLITE_DB_NAME = "corporation.db"
 
 
-async def get_connection():
-    """Створюємо та повертаємо об'єкт з'єднання."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
-        connection.row_factory = aiosqlite.Row
-        yield connection
-        await connection.close()
+# довгоживучі з'єднання з БД, які відкриваються при старті сервера
+pool = SQLitePool(SQLITE_DB_NAME)
 
 
 async def create_tables() -> None:
-    """Створення таблиць в БД при старті програми та автоматичне закриття з'єднання після завершення."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
+    """Створення таблиць в БД при старті програми через з'єднання пулу для запису."""
+    async with pool.writer() as connection:
         cursor: aiosqlite.Cursor = await connection.cursor()
         await cursor.execute(
             """
@@ -57,10 +58,29 @@ async def create_tables() -> None:
                 );
             """
         )
+        # email співробітника унікальний, тому створення - один INSERT без попередньої перевірки
+        # якщо в існуючій БД вже є дублікати email, сервер не стартує з поясненням
+        await create_unique_index(
+            connection, "ux_employees_email", "employees", "email"
+        )
         await connection.commit()
 
 
-app = FastAPI(on_startup=(create_tables,), title="Corporation personal API.")
+app = FastAPI(
+    on_startup=(pool.open, create_tables),
+    on_shutdown=(pool.close,),
+    title="Corporation personal API.",
+)
+# списки підрозділів і працівників рідко змінюються: при повторному запиті - 304
+app.add_middleware(
+    ETagMiddleware, cache_control={"/employees/": NO_CACHE, "/departments/": NO_CACHE}
+)
+# HTML сторінки з таблицями працівників і JSON списки
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=1024,
+    media_types=("text/html", "application/json"),
+)
 
 
 @app.exception_handler(RequestValidationError)
@@ -125,7 +145,7 @@ async def validation_exception_handler(
 )
 async def get_employees(
     request: Request,
-    connection: aiosqlite.Connection = Depends(get_connection),
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
 ) -> HTMLResponse:
     """Отримання всіх співробітників в HTML відповіді (Jinja2)."""
     async with connection.cursor() as cursor:
@@ -150,18 +170,19 @@ async def get_employees(
 @app.get(
     "/departments/",
     status_code=status.HTTP_200_OK,
-    response_class=JSONResponse,
+    response_class=FastJSONResponse,
+    response_model=list[DepartmentInfo],
 )
 async def get_departments(
-    connection: aiosqlite.Connection = Depends(get_connection),
-) -> JSONResponse:
+    connection: aiosqlite.Connection = Depends(pool.read_connection),
+) -> FastJSONResponse:
     """Отримання всіх підрозділів в JSONResponse."""
     async with connection.cursor() as cursor:
         await cursor.execute("SELECT * FROM departments;")
         db_departments = await cursor.fetchall()
 
-    departments = [DepartmentInfo(**info).model_dump() for info in db_departments]
-    return JSONResponse(departments, status.HTTP_200_OK)
+    # рядки таблиці departments вже мають типи DepartmentInfo
+    return FastJSONResponse(db_departments, status.HTTP_200_OK)
 
 
 # curl -i -X DELETE http://127.0.0.0.1:8000/employees/<employee_id>
@@ -173,7 +194,7 @@ async def get_departments(
 async def delete_employee(
     request: Request,
     employee_id: int,
-    connection: aiosqlite.Connection = Depends(get_connection),
+    connection: aiosqlite.Connection = Depends(pool.write_connection),
 ) -> RedirectResponse:
     """
     Отримання всіх підрозділів в JSONResponse і переадресація на HTML сторінку із списком співробітників.
@@ -200,36 +221,32 @@ async def delete_employee(
     "/employees/", status_code=status.HTTP_201_CREATED, response_model=EmployeeInfo
 )
 async def create_employee(
-    data: EmployeeCreate, connection: aiosqlite.Connection = Depends(get_connection)
+    data: EmployeeCreate,
+    connection: aiosqlite.Connection = Depends(pool.write_connection),
 ) -> EmployeeInfo | JSONResponse:
     """Створення співробітника і логування помилки."""
-    async with connection.cursor() as cursor:
-        try:
-            await cursor.execute(
-                "SELECT id FROM employees WHERE email = ?;", (data.email,)
-            )
-            db_employee = await cursor.fetchone()
-
-            if db_employee is not None:
-                raise HTTPException(status.HTTP_400_BAD_REQUEST, "Employee exists.")
-
-            await cursor.execute(
-                "INSERT INTO employees (name, email, job_title, salary, department_id) VALUES (?, ?, ?, ?, ?) RETURNING *;",
-                (
-                    data.name,
-                    data.email,
-                    data.job_title,
-                    data.salary,
-                    data.department_id,
-                ),
-            )
-            last_inserted = await cursor.fetchone()
-            await connection.commit()
-        except Exception:
-            logging.exception("Unexpected error.")
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"message": "Internal Server Error."},
-            )
-
-    return EmployeeInfo(**last_inserted)
+    try:
+        # співробітник з таким email вже є, якщо RETURNING нічого не повернув
+        rows = await connection.execute_fetchall(
+            "INSERT INTO employees (name, email, job_title, salary, department_id) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (email) DO NOTHING RETURNING *;",
+            (
+                data.name,
+                data.email,
+                data.job_title,
+                data.salary,
+                data.department_id,
+            ),
+        )
+        await connection.commit()
+    except Exception:
+        logging.exception("Unexpected error.")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"message": "Internal Server Error."},
+        )
+
+    if not rows:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Employee exists.")
+
+    return EmployeeInfo(**rows[0])
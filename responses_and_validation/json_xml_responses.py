@@ -2,20 +2,18 @@ import aiosqlite
 from fastapi import Depends, FastAPI, HTTPException, Response, status
 from models import DepartmentCreate, DepartmentInfo, EmployeeCreate
 
+from FastAPI.common.sqlite_pool import SQLitePool, create_unique_index
+
 SQLITE_DB_NAME = "corporation.db"
 
 
-async def get_connection():
-    """Створюємо та повертаємо об'єкт з'єднання."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
-        connection.row_factory = aiosqlite.Row
-        yield connection
-        await connection.close()
+# довгоживучі з'єднання з БД, які відкриваються при старті сервера
+pool = SQLitePool(SQLITE_DB_NAME)
 
 
 async def create_tables() -> None:
-    """Створення таблиць в БД при старті програми та автоматичне закриття з'єднання після завершення."""
-    async with aiosqlite.connect(SQLITE_DB_NAME) as connection:
+    """Створення таблиць в БД при старті програми через з'єднання пулу для запису."""
+    async with pool.writer() as connection:
         cursor: aiosqlite.Cursor = await connection.cursor()
         await cursor.execute(
             """
@@ -38,10 +36,19 @@ async def create_tables() -> None:
                 );
             """
         )
+        # email співробітника унікальний, тому створення - один INSERT без попередньої перевірки
+        # якщо в існуючій БД вже є дублікати email, сервер не стартує з поясненням
+        await create_unique_index(
+            connection, "ux_employees_email", "employees", "email"
+        )
         await connection.commit()
 
 
-app = FastAPI(on_startup=(create_tables,), title="Corporation personal API.")
+app = FastAPI(
+    on_startup=(pool.open, create_tables),
+    on_shutdown=(pool.close,),
+    title="Corporation personal API.",
+)
 
 
 # http://127.0.0.1:8000/departments/
@@ -54,24 +61,23 @@ app = FastAPI(on_startup=(create_tables,), title="Corporation personal API.")
     response_model=DepartmentInfo,
 )
 async def create_department(
-    data: DepartmentCreate, connection: aiosqlite.Connection = Depends(get_connection)
+    data: DepartmentCreate,
+    connection: aiosqlite.Connection = Depends(pool.write_connection),
 ) -> DepartmentInfo:
     """Створення підрозділу та повернення стандартної відповіді в JSON."""
 
     print(f"Дані для створення підрозділу: {data.model_dump()}")
 
-    async with connection.cursor() as cursor:
-        await cursor.execute("SELECT id FROM departments WHERE name = ?;", (data.name,))
-        db_department = await cursor.fetchone()
-
-        if db_department is not None:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Department exists.")
-
-        await cursor.execute(
-            "INSERT INTO departments (name) VALUES (?) RETURNING id;", (data.name,)
-        )
-        last_inserted = await cursor.fetchone()
-        await connection.commit()
+    # назва підрозділу унікальна: якщо він вже є, RETURNING нічого не повертає
+    rows = await connection.execute_fetchall(
+        "INSERT INTO departments (name) VALUES (?) "
+        "ON CONFLICT (name) DO NOTHING RETURNING id;",
+        (data.name,),
+    )
+    await connection.commit()
+    if not rows:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Department exists.")
+    last_inserted = rows[0]
 
     return DepartmentInfo(id=last_inserted["id"], name=data.name)
 
@@ -91,38 +97,33 @@ async def create_department(
     response_class=Response,
 )
 async def create_employee(
-    data: EmployeeCreate, connection: aiosqlite.Connection = Depends(get_connection)
+    data: EmployeeCreate,
+    connection: aiosqlite.Connection = Depends(pool.write_connection),
 ) -> Response:
     """Створення співробітника та повернення відповіді в форматі XML."""
 
     print(f"Дані для створення співробітника: {data.model_dump()}")
 
-    async with connection.cursor() as cursor:
-        await cursor.execute("SELECT id FROM employees WHERE email = ?;", (data.email,))
-        db_employee = await cursor.fetchone()
-
-        if db_employee is not None:
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Employee exists.")
-
-        await cursor.execute(
-            "INSERT INTO employees (name, email, job_title, salary, department_id) VALUES (?, ?, ?, ?, ?) RETURNING *;",
-            (data.name, data.email, data.job_title, data.salary, data.department_id),
-        )
-        last_inserted = await cursor.fetchone()
-        await connection.commit()
-
-        xml_content = None
-
-        if last_inserted is not None:
-            xml_content = f"""
-                <employee>
-                    <id>{last_inserted["id"]}</id>
-                    <name>{last_inserted["name"]}</name>
-                    <email>{last_inserted["email"]}</email>
-                    <job_title>{last_inserted["job_title"]}</job_title>
-                    <salary>{last_inserted["salary"]}</salary>
-                    <department_id>{last_inserted["department_id"]}</department_id>
-                </employee>
-            """
+    # співробітник з таким email вже є, якщо RETURNING нічого не повернув
+    rows = await connection.execute_fetchall(
+        "INSERT INTO employees (name, email, job_title, salary, department_id) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT (email) DO NOTHING RETURNING *;",
+        (data.name, data.email, data.job_title, data.salary, data.department_id),
+    )
+    await connection.commit()
+    if not rows:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Employee exists.")
+    last_inserted = rows[0]
+
+    xml_content = f"""
+        <employee>
+            <id>{last_inserted["id"]}</id>
+            <name>{last_inserted["name"]}</name>
+            <email>{last_inserted["email"]}</email>
+            <job_title>{last_inserted["job_title"]}</job_title>
+            <salary>{last_inserted["salary"]}</salary>
+            <department_id>{last_inserted["department_id"]}</department_id>
+        </employee>
+    """
 
     return Response(content=xml_content, media_type="application/xml")